@@ -0,0 +1,86 @@
+"""
+NetworkTopology scaling on 1 to N processes (workers parameter)
+
+A synthetic grid network is used (no OSM request), the output of each run is compared with the serial one.
+
+    python benchmarks/network_topology_workers.py --grid-size 150 --nodes 5000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from shapely.geometry import LineString
+from shapely.geometry import Point
+
+from osmgt.helpers.logger import Logger
+from osmgt.geometry.network_topology import NetworkTopology
+
+
+def build_grid_network(grid_size: int):
+    features = []
+    for idx in range(grid_size):
+        # each street is digitized with a vertex at each crossing
+        features.append(
+            {"uuid": len(features) + 1, "id": str(len(features) + 1),
+             "geometry": LineString([(x, idx) for x in range(grid_size)])}
+        )
+        features.append(
+            {"uuid": len(features) + 1, "id": str(len(features) + 1),
+             "geometry": LineString([(idx, y) for y in range(grid_size)])}
+        )
+    return features
+
+
+def build_nodes(grid_size: int, nb_nodes: int, seed: int = 0):
+    coordinates = np.random.default_rng(seed).uniform(0, grid_size - 1, (nb_nodes, 2))
+    return [
+        {"uuid": idx, "id": str(idx), "geometry": Point(coords)}
+        for idx, coords in enumerate(coordinates.tolist(), start=1)
+    ]
+
+
+def run_topology(logger, grid_size, nb_nodes, mode, interpolate_lines, workers):
+    start = time.perf_counter()
+    output = NetworkTopology(
+        logger,
+        build_grid_network(grid_size),
+        build_nodes(grid_size, nb_nodes),
+        "uuid",
+        "id",
+        mode,
+        interpolate_lines,
+        workers=workers,
+    ).run()
+    return time.perf_counter() - start, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grid-size", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--mode", default="vehicle", choices=["vehicle", "pedestrian"])
+    parser.add_argument("--interpolate-lines", action="store_true")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    logger = Logger(logger_name="benchmark", logger_level="warning").logger
+
+    reference_duration, reference = run_topology(
+        logger, args.grid_size, args.nodes, args.mode, args.interpolate_lines, 1
+    )
+    reference = [(feature["uuid"], feature["geometry"].wkb) for feature in reference]
+    print(f"workers=1: {reference_duration:.2f}s ({len(reference)} lines)")
+
+    for workers in range(2, args.max_workers + 1):
+        duration, output = run_topology(
+            logger, args.grid_size, args.nodes, args.mode, args.interpolate_lines, workers
+        )
+        output = [(feature["uuid"], feature["geometry"].wkb) for feature in output]
+        assert output == reference, f"workers={workers}: output differs from the serial run"
+        print(f"workers={workers}: {duration:.2f}s (speedup x{reference_duration / duration:.2f})")
+
+
+if __name__ == "__main__":
+    main()
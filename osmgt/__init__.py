@@ -1 +1,2 @@
 from osmgt.main import OsmGt
+from osmgt.processing.session import NetworkSession
@@ -164,23 +164,7 @@ class OsmGtCore(Logger):
                 "GeoDataframe creation is impossible, because no data has been found"
             )
 
-        if not isinstance(self._output_data, gpd.GeoDataFrame):
-            # more performance comparing .from_features() method
-            df = pd.DataFrame()
-            for chunk in chunker(self._output_data, 100000):
-                df_tmp = pd.DataFrame(chunk)
-                df = pd.concat((df, df_tmp), axis=0)
-            df: pd.DataFrame = pd.DataFrame(self._output_data)
-
-            geometry = df[self._GEOMETRY_FIELD]
-            output_gdf: gpd.GeoDataFrame = gpd.GeoDataFrame(
-                df.drop([self._GEOMETRY_FIELD], axis=1),
-                crs=f"EPSG:{epsg_4326}",
-                geometry=geometry.to_list(),
-            )
-
-        else:
-            output_gdf: gpd.GeoDataFrame = self._output_data
+        output_gdf: gpd.GeoDataFrame = self._output_data_to_gdf()
 
         self._check_build_input_data(output_gdf)
 
@@ -190,6 +174,26 @@ class OsmGtCore(Logger):
 
         return output_gdf
 
+    def _output_data_to_gdf(self) -> gpd.GeoDataFrame:
+        if isinstance(self._output_data, gpd.GeoDataFrame):
+            return self._output_data
+
+        # more performance comparing .from_features() method
+        df = pd.DataFrame()
+        for chunk in chunker(self._output_data, 100000):
+            df_tmp = pd.DataFrame(chunk)
+            df = pd.concat((df, df_tmp), axis=0)
+        df: pd.DataFrame = pd.DataFrame(self._output_data)
+
+        geometry = df[self._GEOMETRY_FIELD]
+        output_gdf: gpd.GeoDataFrame = gpd.GeoDataFrame(
+            df.drop([self._GEOMETRY_FIELD], axis=1),
+            crs=f"EPSG:{epsg_4326}",
+            geometry=geometry.to_list(),
+        )
+
+        return output_gdf
+
     def _check_build_input_data(self, output_gdf) -> None:
         if output_gdf.shape[0] == 0:
             raise EmptyData("Data is empty!")
@@ -1,4 +1,7 @@
 import geopandas as gpd
+import pandas as pd
+import numpy as np
+import shapely
 from typing import Tuple
 from typing import List
 from typing import Optional
@@ -7,17 +10,19 @@ from typing import Dict
 from osmgt.helpers.global_values import epsg_4326
 from osmgt.helpers.global_values import forward_tag
 from osmgt.helpers.global_values import topology_fields
+from osmgt.helpers.global_values import topology_attributes_index
+from osmgt.helpers.global_values import topology_direction_field
+from osmgt.helpers.global_values import direction_codes
 
 from osmgt.compoments.core import OsmGtCore
 from osmgt.compoments.core import EmptyData
 
 from osmgt.geometry.network_topology import NetworkTopology
 
-from osmgt.geometry.geom_helpers import compute_wg84_line_length
+from osmgt.geometry.geom_helpers import compute_wg84_lines_length
 from osmgt.geometry.geom_helpers import linestring_points_fom_positions
 
 from shapely.geometry import LineString
-from shapely.geometry import Point
 
 # to facilitate debugging
 try:
@@ -41,15 +46,18 @@ class OsmGtRoads(OsmGtCore):
     __slots__ = (
         "_mode",
         "_output_data",
-        "_OUTPUT_EXPECTED_GEOM_TYPE"
+        "_OUTPUT_EXPECTED_GEOM_TYPE",
+        "_attributes_table",
     )
     _FEATURE_OSM_TYPE: str = "way"
-
+    # edges are identified by integers (see NetworkTopology), the public roads output keeps the string ids
+    _INTEGER_EDGE_IDS: bool = False
 
     def __init__(self) -> None:
         super().__init__()
 
         self._mode = None
+        self._attributes_table: List[Dict] = []
 
     def from_location(
         self,
@@ -57,6 +65,7 @@ class OsmGtRoads(OsmGtCore):
         additional_nodes: Optional[gpd.GeoDataFrame],
         mode: str,
         interpolate_lines: bool = False,
+        snapping_tolerance: Optional[float] = None,
     ) -> None:
 
         # TODO refactor (dependency on isochone class)
@@ -70,7 +79,7 @@ class OsmGtRoads(OsmGtCore):
         request = self._from_location_name_query_builder(self._location_id, query)
         raw_data = self._query_on_overpass_api(request)
         self._output_data = self.__build_network_topology(
-            raw_data, additional_nodes, mode, interpolate_lines
+            raw_data, additional_nodes, mode, interpolate_lines, snapping_tolerance
         )
 
     def from_bbox(
@@ -79,6 +88,7 @@ class OsmGtRoads(OsmGtCore):
         additional_nodes: Optional[gpd.GeoDataFrame],
         mode: str,
         interpolate_lines: bool = False,
+        snapping_tolerance: Optional[float] = None,
     ) -> None:
 
         # TODO refactor (dependency on isochone class)
@@ -92,19 +102,52 @@ class OsmGtRoads(OsmGtCore):
         request = self._from_bbox_query_builder(self._bbox_value, query)
         raw_data = self._query_on_overpass_api(request)
         self._output_data = self.__build_network_topology(
-            raw_data, additional_nodes, mode, interpolate_lines
+            raw_data, additional_nodes, mode, interpolate_lines, snapping_tolerance
         )
 
-    def get_graph(self) -> GraphHelpers:
+    def get_graph(self, keep_largest_components: Optional[int] = None) -> GraphHelpers:
+        """
+        Build the graph from the network
+
+        :param keep_largest_components: to only keep the N largest connected components (remove the islands)
+        :type keep_largest_components: int, default None
+        :return: the graph
+        :rtype: GraphHelpers
+        """
         self.logger.info("Prepare graph")
         self._check_network_output_data()
 
         graph = GraphHelpers(
-            self.logger, is_directed=network_queries[self._mode]["directed_graph"]
+            self.logger,
+            is_directed=network_queries[self._mode]["directed_graph"],
+            integer_edge_names=self._INTEGER_EDGE_IDS,
         )
 
-        for feature in self._output_data:
-            graph.add_edge(*self.__compute_edges(feature))
+        if isinstance(self._output_data, gpd.GeoDataFrame):
+            geometries = self._output_data[self._GEOMETRY_FIELD].to_numpy()
+            edges_names = self._output_data[self._TOPO_FIELD].tolist()
+        else:
+            geometries = np.array(
+                [feature[self._GEOMETRY_FIELD] for feature in self._output_data],
+                dtype=object,
+            )
+            edges_names = [feature[self._TOPO_FIELD] for feature in self._output_data]
+
+        # the vertices are named by the wkt of the lines ends
+        sources_names = shapely.to_wkt(
+            shapely.get_point(geometries, 0), rounding_precision=-1
+        ).tolist()
+        targets_names = shapely.to_wkt(
+            shapely.get_point(geometries, -1), rounding_precision=-1
+        ).tolist()
+        lines_length = compute_wg84_lines_length(geometries)
+        for source_name, target_name, edge_name, line_length in zip(
+            sources_names, targets_names, edges_names, lines_length.tolist()
+        ):
+            graph.add_edge(source_name, target_name, edge_name, line_length)
+
+        if keep_largest_components is not None:
+            graph.keep_largest_components(keep_largest_components)
 
         return graph
 
@@ -114,7 +157,10 @@ class OsmGtRoads(OsmGtCore):
             raise EmptyData("Data is empty!")
 
         # here we check the first feature, all feature should have the same structure
-        first_feature = self._output_data[0]
+        if isinstance(self._output_data, gpd.GeoDataFrame):
+            first_feature = self._output_data.iloc[0]
+        else:
+            first_feature = self._output_data[0]
         assert (
             self._GEOMETRY_FIELD in first_feature
         ), f"{self._GEOMETRY_FIELD} key not found!"
@@ -124,23 +170,14 @@ class OsmGtRoads(OsmGtCore):
         ), f"{self._GEOMETRY_FIELD} key not found!"
         assert self._TOPO_FIELD in first_feature, f"{self._TOPO_FIELD} key not found!"
 
-    def __compute_edges(self, feature: Dict) -> Tuple[str, str, str, float]:
-        geometry = feature[self._GEOMETRY_FIELD]
-        first_coords, *_, last_coords = geometry.coords
-        return (
-            Point(first_coords).wkt,
-            Point(last_coords).wkt,
-            feature[self._TOPO_FIELD],
-            compute_wg84_line_length(geometry),
-        )
-
     def __build_network_topology(
         self,
         raw_data: List[Dict],
         additional_nodes: Optional[gpd.GeoDataFrame],
         mode: str,
         interpolate_lines: bool,
-    ) -> List[Dict]:
+        snapping_tolerance: Optional[float] = None,
+    ) -> gpd.GeoDataFrame:
         if additional_nodes is not None:
             additional_nodes = self._check_topology_field(additional_nodes)
             # filter nodes from study_area_geom
@@ -165,7 +202,7 @@ class OsmGtRoads(OsmGtCore):
             additional_nodes = additional_nodes_filtered.to_dict("records")
 
         raw_data_restructured = self.__rebuild_network_data(raw_data)
-        raw_data_topology_rebuild = NetworkTopology(
+        network_topology = NetworkTopology(
             self.logger,
             raw_data_restructured,
             additional_nodes,
@@ -173,9 +210,38 @@ class OsmGtRoads(OsmGtCore):
             self._ID_OSM_FIELD,
             mode,
             interpolate_lines,
-        ).run()
+            shared_attributes=True,
+            integer_edge_ids=self._INTEGER_EDGE_IDS,
+            snapping_tolerance=snapping_tolerance,
+            columnar_output=True,
+        )
+        output_columns = network_topology.run()
+        # OSM attributes are joined on the lines when the GeoDataframe is built
+        self._attributes_table = network_topology.attributes_table
+
+        geometry = output_columns.pop(self._GEOMETRY_FIELD)
+        return gpd.GeoDataFrame(
+            output_columns, crs=f"EPSG:{epsg_4326}", geometry=geometry
+        )
+
+    def _output_data_to_gdf(self) -> gpd.GeoDataFrame:
+        output_gdf = super()._output_data_to_gdf()
 
-        return raw_data_topology_rebuild
+        if topology_attributes_index in output_gdf.columns:
+            attributes = pd.DataFrame(self._attributes_table).take(
+                output_gdf[topology_attributes_index].to_numpy()
+            )
+            attributes.index = output_gdf.index
+            output_gdf = gpd.GeoDataFrame(
+                pd.concat(
+                    [attributes, output_gdf.drop(columns=[topology_attributes_index])],
+                    axis=1,
+                ),
+                crs=output_gdf.crs,
+                geometry=self._GEOMETRY_FIELD,
+            )
+
+        return output_gdf
 
     def __rebuild_network_data(self, raw_data: List[Dict]) -> List[Dict]:
         self.logger.info("Rebuild network data")
@@ -211,9 +277,14 @@ class OsmGtRoads(OsmGtCore):
         lines_unchanged = network_gdf.loc[network_gdf["topology"] == "unchanged"]
         lines_added = network_gdf.loc[network_gdf["topology"] == "added"]
         if network_queries[self._mode]["directed_graph"]:
+            if self._INTEGER_EDGE_IDS:
+                forward_mask = (
+                    network_gdf[topology_direction_field] == direction_codes[forward_tag]
+                )
+            else:
+                forward_mask = network_gdf[self._TOPO_FIELD].str.contains(forward_tag)
             nodes_added = network_gdf.loc[
-                (network_gdf["topology"] == "added")
-                & (network_gdf[self._TOPO_FIELD].str.contains(forward_tag))
+                (network_gdf["topology"] == "added") & forward_mask
             ]
         else:
             nodes_added = network_gdf.loc[network_gdf["topology"] == "added"]
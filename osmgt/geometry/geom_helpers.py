@@ -1,12 +1,18 @@
+from typing import Iterable
 from typing import List
 from typing import Union
 
+from functools import lru_cache
+
+import numpy as np
+
 import geopandas as gpd
 
+import shapely
+
 from pyproj import Geod
 from pyproj import Transformer
 
-from shapely.ops import transform
 from shapely.ops import linemerge
 
 from shapely.geometry import base
@@ -17,6 +23,9 @@ from shapely.geometry import Polygon
 from shapely.geometry import MultiPolygon
 
 
+wgs84_geod = Geod(ellps="WGS84")
+
+
 def compute_wg84_line_length(input_geom: Union[LineString, MultiLineString]) -> float:
     """
     Compute the length of a wg84 line (LineString and MultiLineString)
@@ -28,11 +37,85 @@ def compute_wg84_line_length(input_geom: Union[LineString, MultiLineString]) ->
 
     """
 
-    line_length = Geod(ellps="WGS84").geometry_length(input_geom)
+    line_length = wgs84_geod.geometry_length(input_geom)
 
     return line_length
 
 
+def compute_wg84_lines_length(
+    input_geoms: Iterable[Union[LineString, MultiLineString]]
+) -> np.ndarray:
+    """
+    Compute the length of wg84 lines (LineString and MultiLineString), all the segments are computed with
+    one call
+
+    :param input_geoms: input geometries
+    :type input_geoms: iterable of shapely.geometry.LineString or shapely.geometry.MultiLineString
+    :return: the lines length
+    :rtype: numpy.ndarray
+    """
+    input_geoms = np.asarray(input_geoms, dtype=object)
+    lines, lines_geom_index = shapely.get_parts(input_geoms, return_index=True)
+    coordinates, coordinates_line_index = shapely.get_coordinates(
+        lines, return_index=True
+    )
+
+    # segments are the consecutive coordinates of the same line
+    segments_mask = coordinates_line_index[1:] == coordinates_line_index[:-1]
+    _, _, segments_length = wgs84_geod.inv(
+        coordinates[:-1, 0][segments_mask],
+        coordinates[:-1, 1][segments_mask],
+        coordinates[1:, 0][segments_mask],
+        coordinates[1:, 1][segments_mask],
+    )
+    lines_length = np.bincount(
+        coordinates_line_index[1:][segments_mask],
+        weights=segments_length,
+        minlength=lines.size,
+    )
+
+    return np.bincount(lines_geom_index, weights=lines_length, minlength=input_geoms.size)
+
+
+def geodesic_to_planar_positions(
+    input_geom: LineString, positions: Iterable[float]
+) -> np.ndarray:
+    """
+    Convert normalized positions along a wg84 line, measured on its geodesic length, to normalized positions
+    on its planar length (the positions used by shapely)
+
+    :param input_geom: input geometry
+    :type input_geom: shapely.geometry.LineString
+    :param positions: normalized geodesic positions
+    :type positions: iterable of float
+    :return: the normalized planar positions
+    :rtype: numpy.ndarray
+    """
+    positions = np.asarray(positions, dtype=float)
+    coordinates = shapely.get_coordinates(input_geom)
+    # a single segment has the same positions on both lengths
+    if coordinates.shape[0] <= 2:
+        return positions
+
+    _, _, segments_length = wgs84_geod.inv(
+        coordinates[:-1, 0],
+        coordinates[:-1, 1],
+        coordinates[1:, 0],
+        coordinates[1:, 1],
+    )
+    geodesic_length = np.r_[0.0, np.cumsum(segments_length)]
+    planar_length = np.r_[
+        0.0, np.cumsum(np.hypot(*np.diff(coordinates, axis=0).T))
+    ]
+    if geodesic_length[-1] == 0 or planar_length[-1] == 0:
+        return positions
+
+    return (
+        np.interp(positions * geodesic_length[-1], geodesic_length, planar_length)
+        / planar_length[-1]
+    )
+
+
 def reprojection(geometry: base, from_epsg: str, to_epsg: str) -> base:
     """
     reprojection
@@ -43,13 +126,81 @@ def reprojection(geometry: base, from_epsg: str, to_epsg: str) -> base:
     :rtype: shapely.geometry.*
     """
 
-    if from_epsg != to_epsg:
-        proj_transformer = Transformer.from_crs(
-            f"EPSG:{from_epsg}", f"EPSG:{to_epsg}", always_xy=True
-        )
-        geometry = transform(proj_transformer.transform, geometry)
+    return reproject_geometries([geometry], f"EPSG:{from_epsg}", f"EPSG:{to_epsg}")[0]
 
-    return geometry
+
+@lru_cache(maxsize=None)
+def get_transformer(from_crs: str, to_crs: str) -> Transformer:
+    """
+    Get a transformer (xy order), built once by crs pair
+
+    :type from_crs: str (ex: "EPSG:4326" or a proj string)
+    :type to_crs: str
+    :rtype: pyproj.Transformer
+    """
+    return Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+
+def reproject_geometries(
+    geometries: Iterable[base], from_crs: str, to_crs: str
+) -> np.ndarray:
+    """
+    Reproject an array of geometries: all the coordinates are transformed with one call
+
+    :type geometries: iterable of shapely.geometry.* (list, numpy.ndarray, GeoSeries...)
+    :type from_crs: str (ex: "EPSG:4326" or a proj string)
+    :type to_crs: str
+    :rtype: numpy.ndarray of shapely.geometry.*
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    if from_crs == to_crs:
+        return geometries
+
+    transformer = get_transformer(from_crs, to_crs)
+    return shapely.transform(
+        geometries,
+        lambda coordinates: np.column_stack(
+            transformer.transform(coordinates[:, 0], coordinates[:, 1])
+        ),
+    )
+
+
+def concatenate_lines(
+    lines: Iterable[LineString], lines_reversed: Iterable[bool]
+) -> LineString:
+    """
+    Concatenate lines following each other: once oriented, each line starts where the previous one ends
+
+    :param lines: lines, ordered
+    :type lines: iterable of shapely.geometry.LineString
+    :param lines_reversed: lines to reverse
+    :type lines_reversed: iterable of bool
+    :rtype: shapely.geometry.LineString
+    """
+    lines = np.asarray(lines, dtype=object)
+    lines = np.where(
+        np.asarray(lines_reversed, dtype=bool), shapely.reverse(lines), lines
+    )
+    coordinates = shapely.get_coordinates(lines)
+
+    # the first coordinate of a line is the last one of the previous line
+    lines_start = np.cumsum(shapely.get_num_coordinates(lines))[:-1]
+    coordinates_kept = np.ones(coordinates.shape[0], dtype=bool)
+    coordinates_kept[lines_start] = False
+
+    return LineString(coordinates[coordinates_kept])
+
+
+def local_metric_crs(longitude: float, latitude: float) -> str:
+    """
+    Azimuthal equidistant crs (meters) centered on a location: distances are true from the center and
+    nearly true around it
+
+    :type longitude: float
+    :type latitude: float
+    :rtype: str
+    """
+    return f"+proj=aeqd +lat_0={latitude} +lon_0={longitude} +datum=WGS84 +units=m +no_defs"
 
 
 def line_conversion(
@@ -0,0 +1,156 @@
+from typing import Dict
+from typing import Iterable
+
+import math
+
+import numpy as np
+
+from scipy import ndimage
+
+import shapely
+from shapely.geometry import LineString
+from shapely.geometry import MultiPolygon
+from shapely.geometry import Polygon
+
+from osmgt.geometry.geom_helpers import convert_to_polygon
+
+
+DEFAULT_CAPSTYLE: int = 1
+DEFAULT_JOINSTYLE: int = 1
+
+
+def build_isochrone_polygon(
+    lines: Iterable[LineString], display_mode_params: Dict, method: str = "buffer"
+) -> MultiPolygon:
+    """
+    Build an isochrone polygon from the reached network lines, holes are removed
+
+    - "buffer": the lines are buffered, merged, then dilated and eroded. Exact shape (at the buffer
+      resolution), but the GEOS union and buffers are slow on large catchments
+    - "raster": the lines are burnt on a grid (cell size: raster_cell_size), closed with a dilation and an
+      erosion, then vectorized. The boundary is stepped (precision: 1 cell, smoothed), the cost grows with the
+      number of cells instead of the number of lines: much faster on large catchments
+    - "concave_hull": concave hull of the line vertices (ratio: concave_hull_ratio). The fastest, but the
+      subnetworks are not isolated and the shape depends on the vertices density
+
+    :param lines: network lines reached
+    :type lines: iterable of shapely.geometry.LineString
+    :param display_mode_params: buffer parameters (see isochrone_display_mode)
+    :type display_mode_params: dict
+    :param method: one of polygon_methods
+    :type method: str, default "buffer"
+    :return: the isochrone polygon
+    :rtype: shapely.geometry.MultiPolygon
+    :raises ValueError: if the method is unknown
+    """
+    if method not in polygon_methods:
+        raise ValueError(f"'method' must be one of {', '.join(polygon_methods)}")
+
+    return polygon_methods[method](lines, display_mode_params)
+
+
+def _build_polygon_from_buffers(
+    lines: Iterable[LineString], display_mode_params: Dict
+) -> MultiPolygon:
+    # array operations: GEOS runs without the GIL, the isochrones can be built on threads
+    lines_buffered = shapely.union_all(
+        shapely.buffer(
+            np.asarray(lines, dtype=object),
+            display_mode_params["path_buffered"],
+            quad_segs=display_mode_params["resolution"],
+            cap_style=DEFAULT_CAPSTYLE,
+            join_style=DEFAULT_JOINSTYLE,
+        )
+    )
+
+    # we want to isolate subnetwork: each part is merged (dilation then erosion) on its own
+    iso_polygons = shapely.get_parts(lines_buffered)
+    for distance in (display_mode_params["dilatation"], display_mode_params["erosion"]):
+        iso_polygons = shapely.buffer(
+            iso_polygons,
+            distance,
+            quad_segs=display_mode_params["resolution"],
+            cap_style=display_mode_params["cap_style"],
+            join_style=display_mode_params["join_style"],
+        )
+    iso_polygons = shapely.get_parts(iso_polygons)
+
+    # compute exterior
+    iso_polygons = shapely.polygons(
+        shapely.get_exterior_ring(iso_polygons[~shapely.is_empty(iso_polygons)])
+    )
+    return MultiPolygon(iso_polygons.tolist())
+
+
+def _build_polygon_from_raster(
+    lines: Iterable[LineString], display_mode_params: Dict
+) -> MultiPolygon:
+    lines = np.asarray(lines, dtype=object)
+    if lines.size == 0:
+        return MultiPolygon()
+
+    cell_size = display_mode_params["raster_cell_size"]
+    path_cells = max(1, math.ceil(display_mode_params["path_buffered"] / cell_size))
+    closing_cells = max(1, math.ceil(display_mode_params["dilatation"] / cell_size))
+    border_cells = path_cells + closing_cells + 1
+
+    # burn the lines: their vertices are densified to half a cell
+    coordinates = shapely.get_coordinates(shapely.segmentize(lines, cell_size / 2))
+    x_min, y_min = coordinates.min(axis=0) - border_cells * cell_size
+    cells = np.floor((coordinates - (x_min, y_min)) / cell_size).astype(np.int64)
+    grid = np.zeros(cells.max(axis=0) + border_cells + 1, dtype=bool)
+    grid[cells[:, 0], cells[:, 1]] = True
+
+    # path buffer then closing (dilation + erosion) to merge the roads, holes are filled
+    structure = ndimage.generate_binary_structure(2, 1)
+    grid = ndimage.binary_dilation(grid, structure, iterations=path_cells)
+    grid = ndimage.binary_closing(grid, structure, iterations=closing_cells)
+    grid = ndimage.binary_fill_holes(grid)
+
+    # vectorize: each run of cells on a grid column is a box, boxes do not overlap but meet on T-junctions (not
+    # a noded coverage): they are merged with a full union
+    grid_padded = np.zeros((grid.shape[0], grid.shape[1] + 2), dtype=np.int8)
+    grid_padded[:, 1:-1] = grid
+    runs_x, runs_start = np.nonzero(np.diff(grid_padded, axis=1) == 1)
+    _, runs_end = np.nonzero(np.diff(grid_padded, axis=1) == -1)
+    boxes = shapely.box(
+        x_min + runs_x * cell_size,
+        y_min + runs_start * cell_size,
+        x_min + (runs_x + 1) * cell_size,
+        y_min + runs_end * cell_size,
+    )
+    polygon = shapely.union_all(boxes).simplify(cell_size / 2)
+
+    # only the polygons of a valid output are kept (a simplified shape can be a collection)
+    polygon_parts = shapely.get_parts(shapely.make_valid(polygon))
+    polygon_parts = polygon_parts[
+        (shapely.get_type_id(polygon_parts) == 3) & ~shapely.is_empty(polygon_parts)
+    ]
+    return MultiPolygon(shapely.polygons(shapely.get_exterior_ring(polygon_parts)).tolist())
+
+
+def _build_polygon_from_concave_hull(
+    lines: Iterable[LineString], display_mode_params: Dict
+) -> MultiPolygon:
+    lines = np.asarray(lines, dtype=object)
+    if lines.size == 0:
+        return MultiPolygon()
+
+    vertices = shapely.multipoints(shapely.get_coordinates(lines))
+    polygon = shapely.concave_hull(
+        vertices, ratio=display_mode_params["concave_hull_ratio"]
+    ).buffer(
+        display_mode_params["path_buffered"],
+        quad_segs=display_mode_params["resolution"],
+    )
+
+    return MultiPolygon(
+        [Polygon(polygon_part.exterior) for polygon_part in convert_to_polygon(polygon)]
+    )
+
+
+polygon_methods: Dict = {
+    "buffer": _build_polygon_from_buffers,
+    "raster": _build_polygon_from_raster,
+    "concave_hull": _build_polygon_from_concave_hull,
+}
@@ -6,25 +6,37 @@ from typing import Set
 from typing import Union
 from typing import Iterator
 
-from scipy import spatial
-
-from shapely.geometry import LineString
-
-import rtree
+import shapely
+from shapely import STRtree
 
 import numpy as np
 
 from collections import Counter
 
+from functools import partial
+
+from itertools import chain
+from itertools import repeat
+
+import math
+
 from more_itertools import split_at
 
 from numba import jit
+from numba import prange
 from numba import types as nb_types
 
 import concurrent.futures
+import multiprocessing
 
 from osmgt.helpers.global_values import forward_tag
 from osmgt.helpers.global_values import backward_tag
+from osmgt.helpers.global_values import topology_attributes_index
+from osmgt.helpers.global_values import topology_way_field
+from osmgt.helpers.global_values import topology_split_field
+from osmgt.helpers.global_values import topology_segment_field
+from osmgt.helpers.global_values import topology_direction_field
+from osmgt.helpers.global_values import direction_codes
 
 
 class NetworkTopologyError(Exception):
@@ -37,6 +49,12 @@ class NetworkTopology:
         "_network_data",
         "_mode_post_processing",
         "_improve_line_output",
+        "_exact_node_projection",
+        "_workers",
+        "_shared_attributes",
+        "_attributes_table",
+        "_integer_edge_ids",
+        "_snapping_tolerance",
         "_additional_nodes",
         "__FIELD_ID",
         "_original_field_id",
@@ -44,15 +62,14 @@ class NetworkTopology:
         "__connections_added",
         "_output",
         "logger",
-        "__tree_index",
-        "__node_by_nearest_lines"
+        "__node_by_nearest_lines",
     )
 
     __INTERPOLATION_LEVEL: int = 7
     __INTERPOLATION_LINE_LEVEL: int = 4
-    __NB_OF_NEAREST_LINE_ELEMENTS_TO_FIND: int = 10
 
     __NUMBER_OF_NODES_INTERSECTIONS: int = 2
+    __TILES_BY_WORKER: int = 4
     __ITEM_LIST_SEPARATOR_TO_SPLIT_LINE: str = "_"
 
     __CLEANING_FILED_STATUS: str = "topology"
@@ -87,6 +104,12 @@ class NetworkTopology:
         original_field_id: str,
         mode_post_processing: str,
         improve_line_output: bool = False,
+        exact_node_projection: bool = False,
+        workers: int = 1,
+        shared_attributes: bool = False,
+        integer_edge_ids: bool = False,
+        snapping_tolerance: Optional[float] = None,
+        columnar_output: bool = False,
     ) -> None:
         """
 
@@ -95,6 +118,27 @@ class NetworkTopology:
         :type additional_nodes: list of dict
         :type uuid_field: str
         :type mode_post_processing: str
+        :type improve_line_output: bool
+        :param exact_node_projection: to connect additional nodes on their exact projection on the nearest line,
+            instead of the nearest vertex of the line interpolated (__INTERPOLATION_LEVEL)
+        :type exact_node_projection: bool
+        :param workers: number of processes used to find intersections and build lines on spatial tiles.
+            The output is the same as the serial run (workers=1)
+        :type workers: int
+        :param shared_attributes: to return lines containing only their topology fields and an index
+            (topology_attributes_index) on the attributes of their original way (see attributes_table).
+            Without it, the attributes are copied on each output line at the end of the run: the output
+            keeps its original memory size
+        :type shared_attributes: bool
+        :param integer_edge_ids: to identify lines with an integer (their position in the output) instead of
+            a composed string; the way, split index, segment index and direction are stored on their own fields
+        :type integer_edge_ids: bool
+        :param snapping_tolerance: to merge the network vertices closer than this distance (in the coordinates
+            unit) before finding intersections
+        :type snapping_tolerance: float
+        :param columnar_output: to return the output lines as columns (numpy arrays by field, 1 item by line)
+            instead of a list of features. The attributes are always shared (see attributes_table)
+        :type columnar_output: bool
         """
         self.logger = logger
         self.logger.info("Network cleaning...")
@@ -104,6 +148,13 @@ class NetworkTopology:
         self._network_data: Union[List[Dict], Dict] = self._check_inputs(network_data)
         self._mode_post_processing = mode_post_processing
         self._improve_line_output = improve_line_output  # link to __INTERPOLATION_LINE_LEVEL
+        self._exact_node_projection = exact_node_projection
+        self._workers = workers
+        self._shared_attributes = shared_attributes
+        self._attributes_table: List[Dict] = []
+        self._integer_edge_ids = integer_edge_ids
+        self._snapping_tolerance = snapping_tolerance
+        self._columnar_output = columnar_output
 
         self._additional_nodes = additional_nodes
         if self._additional_nodes is None:
@@ -112,16 +163,19 @@ class NetworkTopology:
         # ugly footway processing...
         # self._force_footway_connection = False
 
-        self.__FIELD_ID = uuid_field  # have to be an integer.. thank rtree...
+        self.__FIELD_ID = uuid_field
         self._original_field_id = original_field_id
 
         self._intersections_found: Optional[Set[Tuple[float, float]]] = None
         self.__connections_added: Dict = {}
-        self._output: List[Dict] = []
+        self._output: Union[List[Dict], Dict[str, np.ndarray]] = []
 
-    def run(self) -> List[Dict]:
+    def run(self) -> Union[List[Dict], Dict[str, np.ndarray]]:
         self._prepare_data()
 
+        if self._snapping_tolerance is not None:
+            self.snap_vertices()
+
         # ugly footway processing...
         # if self._force_footway_connection:
         #     self.prepare_footway_nodes()
@@ -130,15 +184,237 @@ class NetworkTopology:
         if len(self._additional_nodes) > 0:
             self.compute_added_node_connections()
 
-        # find all the existing intersection from coordinates
-        self._intersections_found = set(self.find_intersections_from_ways())
+        if self._workers > 1:
+            output_columns = self._run_on_tiles()
+        else:
+            # find all the existing intersection from coordinates
+            self._intersections_found = set(self.find_intersections_from_ways())
+
+            self.logger.info("Build lines")
+            lines_built = chain.from_iterable(
+                map(self.build_lines, self._network_data.values())
+            )
+            _, output_columns = self._lines_processing(list(lines_built))
+
+        if self._integer_edge_ids:
+            output_columns[self.__FIELD_ID] = np.arange(
+                output_columns[self.__GEOMETRY_FIELD].size
+            )
+            output_columns[topology_way_field] = output_columns[topology_attributes_index]
+
+        if self._columnar_output:
+            self._output = output_columns
+            return self._output
 
-        self.logger.info("Build lines")
-        for feature in self._network_data.values():
-            self.build_lines(feature)
+        self._output = self._columns_to_features(output_columns)
+
+        # backward compatible output: the shared attributes are copied on each line
+        if not self._shared_attributes:
+            self._output = [
+                {**self._attributes_table[feature.pop(topology_attributes_index)], **feature}
+                for feature in self._output
+            ]
 
         return self._output
 
+    @property
+    def attributes_table(self) -> List[Dict]:
+        """
+        return the attributes of each original way (and added node connection)
+
+        :return: the attributes table, indexed by the topology_attributes_index field of each line
+        :rtype: list of dict
+        """
+        return self._attributes_table
+
+    def snap_vertices(self) -> None:
+        self.logger.info("Starting: Snap vertices")
+        lines_keys = list(self._network_data.keys())
+        lines_coords = [
+            np.array(feature[self.__COORDINATES_FIELD], dtype=np.float64)
+            for feature in self._network_data.values()
+        ]
+        lines_offsets = np.cumsum(
+            [0] + [line_coords.shape[0] for line_coords in lines_coords], dtype=np.int64
+        )
+        all_coords = np.concatenate(lines_coords)
+
+        # vertices are hashed on a grid (cell size = tolerance), only the neighbour cells are compared
+        unique_coords, unique_inverse = np.unique(all_coords, axis=0, return_inverse=True)
+        cells = (
+            np.floor(
+                (unique_coords - unique_coords.min(axis=0)) / self._snapping_tolerance
+            ).astype(np.int64)
+            + 1
+        )
+        nb_cells_rows = cells[:, 1].max() + 2
+        cells_keys = cells[:, 0] * nb_cells_rows + cells[:, 1]
+        cells_order = np.argsort(cells_keys, kind="stable")
+        unique_coords_snapped = snap_coordinates_on_grid(
+            unique_coords,
+            cells,
+            nb_cells_rows,
+            cells_keys[cells_order],
+            cells_order,
+            self._snapping_tolerance,
+        )
+        vertices_merged = int(np.any(unique_coords_snapped != unique_coords, axis=1).sum())
+
+        # remove the consecutive duplicated vertices of each line
+        all_coords = unique_coords_snapped[unique_inverse.reshape(-1)]
+        vertices_kept = np.ones(all_coords.shape[0], dtype=bool)
+        vertices_kept[1:] = np.any(all_coords[1:] != all_coords[:-1], axis=1)
+        vertices_kept[lines_offsets[:-1]] = True
+        lines_nb_vertices = np.add.reduceat(vertices_kept.astype(np.int64), lines_offsets[:-1])
+        all_coords = all_coords[vertices_kept]
+        lines_coords = np.split(all_coords, np.cumsum(lines_nb_vertices)[:-1])
+
+        # the geometries are rebuilt (they are used to find the nearest lines of the added nodes), the lines
+        # collapsed on a single vertex are removed
+        lines_collapsed = lines_nb_vertices < 2
+        vertices_line_index = np.repeat(np.arange(len(lines_keys)), lines_nb_vertices)
+        vertices_valid = ~lines_collapsed[vertices_line_index]
+        valid_lines_index = np.cumsum(~lines_collapsed) - 1
+        lines_geometries = iter(
+            shapely.linestrings(
+                all_coords[vertices_valid],
+                indices=valid_lines_index[vertices_line_index[vertices_valid]],
+            )
+        )
+        for line_key, line_coords, line_collapsed in zip(
+            lines_keys, lines_coords, lines_collapsed
+        ):
+            if line_collapsed:
+                del self._network_data[line_key]
+                continue
+            feature = self._network_data[line_key]
+            feature[self.__COORDINATES_FIELD] = list(map(tuple, line_coords.tolist()))
+            feature[self.__GEOMETRY_FIELD] = next(lines_geometries)
+
+        self.__topology_stats["snapped"] = vertices_merged
+        self.__topology_stats["collapsed"] = int(lines_collapsed.sum())
+        self.logger.info(
+            f"Done: Snap vertices: {vertices_merged} vertices merged, {int(lines_collapsed.sum())} lines "
+            f"collapsed (tolerance: {self._snapping_tolerance})"
+        )
+
+    def _run_on_tiles(self) -> Dict[str, np.ndarray]:
+        features = list(self._network_data.values())
+        features_coords = [
+            np.array(feature[self.__COORDINATES_FIELD], dtype=np.float64)
+            for feature in features
+        ]
+        features_offsets = np.cumsum([0] + [coords.shape[0] for coords in features_coords])
+        all_coords = np.concatenate(features_coords)
+
+        tiles_by_axis = math.ceil(math.sqrt(self._workers * self.__TILES_BY_WORKER))
+        coords_tiles = self._compute_tiles(all_coords, tiles_by_axis)
+
+        # spawned workers: the parallel numba kernels start their threading layer at import, a forked process
+        # would inherit it and hang at exit
+        with concurrent.futures.ProcessPoolExecutor(
+            self._workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            # each coordinate belongs to 1 tile: ways crossing tiles are counted on each of them,
+            # so the intersections found on all the tiles are the same than the serial run
+            self.logger.info(f"Starting: Find intersections on {tiles_by_axis ** 2} tiles")
+            tiles_intersections = executor.map(
+                partial(
+                    find_intersections_from_coordinates,
+                    nb_of_nodes=self.__NUMBER_OF_NODES_INTERSECTIONS,
+                ),
+                self._group_by_tiles(all_coords, coords_tiles),
+            )
+            self._intersections_found = set(
+                chain.from_iterable(
+                    map(tuple, intersections.tolist())
+                    for intersections in tiles_intersections
+                )
+            )
+            self.logger.info("Done: Find intersections")
+
+            # a way is built on the tile of its first coordinate
+            self.logger.info("Build lines")
+            tiles_features_idx = self._group_by_tiles(
+                np.arange(len(features)), coords_tiles[features_offsets[:-1]]
+            )
+            tiles_features = [
+                [features[feature_idx] for feature_idx in tile_features_idx.tolist()]
+                for tile_features_idx in tiles_features_idx
+            ]
+            tiles_intersections = [
+                self._intersections_found.intersection(
+                    chain.from_iterable(
+                        feature[self.__COORDINATES_FIELD] for feature in tile_features
+                    )
+                )
+                for tile_features in tiles_features
+            ]
+            tiles_attributes = [
+                {
+                    feature[topology_attributes_index]: self._attributes_table[
+                        feature[topology_attributes_index]
+                    ]
+                    for feature in tile_features
+                }
+                for tile_features in tiles_features
+            ]
+            tiles_output = executor.map(
+                build_lines_from_features,
+                repeat(
+                    (
+                        self.logger,
+                        self.__FIELD_ID,
+                        self._original_field_id,
+                        self._mode_post_processing,
+                        self._improve_line_output,
+                        self._integer_edge_ids,
+                    )
+                ),
+                tiles_features,
+                tiles_attributes,
+                tiles_intersections,
+            )
+
+            # stitch the tiles output following the input order (the rows of a feature are on the same tile)
+            rows_feature = []
+            tiles_columns = []
+            for tile_features_idx, (tile_rows_feature, tile_columns) in zip(
+                tiles_features_idx, tiles_output
+            ):
+                rows_feature.append(tile_features_idx[tile_rows_feature])
+                tiles_columns.append(tile_columns)
+
+        rows_order = np.argsort(np.concatenate(rows_feature), kind="stable")
+        tiles_columns = [
+            tile_columns
+            for tile_columns in tiles_columns
+            if tile_columns[self.__GEOMETRY_FIELD].size > 0
+        ] or tiles_columns[:1]
+
+        return {
+            column_name: np.concatenate(
+                [tile_columns[column_name] for tile_columns in tiles_columns]
+            )[rows_order]
+            for column_name in tiles_columns[0].keys()
+        }
+
+    @staticmethod
+    def _compute_tiles(coordinates: np.ndarray, tiles_by_axis: int) -> np.ndarray:
+        min_coords = coordinates.min(axis=0)
+        extent = np.maximum(coordinates.max(axis=0) - min_coords, np.finfo(np.float64).tiny)
+        cells = np.floor((coordinates - min_coords) / extent * tiles_by_axis).astype(np.int64)
+        cells = np.clip(cells, 0, tiles_by_axis - 1)
+
+        return cells[:, 0] * tiles_by_axis + cells[:, 1]
+
+    @staticmethod
+    def _group_by_tiles(values: np.ndarray, tiles: np.ndarray) -> List[np.ndarray]:
+        tiles_order = np.argsort(tiles, kind="stable")
+        _, tiles_start = np.unique(tiles[tiles_order], return_index=True)
+
+        return np.split(values[tiles_order], tiles_start[1:])
+
     # def prepare_footway_nodes(self) -> None:
     #     import itertools
     #
@@ -197,13 +473,14 @@ class NetworkTopology:
     #     }
     #     self._additional_nodes = {**self._additional_nodes , **footway_additional_nodes}
 
-    def build_lines(self, feature: Dict) -> None:
+    def build_lines(self, feature: Dict) -> List[Dict]:
         # compare line coords and intersections points
         coordinates_list = set(feature[self.__COORDINATES_FIELD])
         points_intersections: Set[Tuple[float, float]] = coordinates_list.intersection(
             self._intersections_found
         )
 
+        lines_built = []
         # rebuild linestring
         if len(set(feature[self.__COORDINATES_FIELD])) > 1:
             lines_coordinates_rebuild = self._topology_builder(
@@ -216,116 +493,171 @@ class NetworkTopology:
                     lines_coordinates_rebuild
                 ):
                     feature_updated = dict(feature)
-                    feature_updated[
-                        self.__FIELD_ID
-                    ] = f"{feature_updated[self.__FIELD_ID]}_{new_suffix_id}"
+                    if self._integer_edge_ids:
+                        feature_updated[topology_split_field] = new_suffix_id
+                    else:
+                        feature_updated[
+                            self.__FIELD_ID
+                        ] = f"{feature_updated[self.__FIELD_ID]}_{new_suffix_id}"
                     feature_updated[
                         self.__CLEANING_FILED_STATUS
                     ] = self.__TOPOLOGY_TAG_SPLIT
                     feature_updated[self.__COORDINATES_FIELD] = line_coordinates
 
-                    new_features = self.mode_processing(feature_updated)
-                    self._output.extend(new_features)
+                    lines_built.append(feature_updated)
             else:
                 # nothing to change
-                feature[self.__FIELD_ID] = feature[self.__FIELD_ID]
-                new_features = self.mode_processing(feature)
-                self._output.extend(new_features)
+                if self._integer_edge_ids:
+                    feature = {**feature, topology_split_field: -1}
+                lines_built.append(feature)
 
-    def mode_processing(self, input_feature):
-        new_elements = []
+        return lines_built
 
+    def mode_processing(self, input_feature: Dict) -> List[Optional[str]]:
         if self._mode_post_processing == "vehicle":
+            attributes = self._attributes_table[input_feature[topology_attributes_index]]
             # by default
-            new_forward_feature = self._direction_processing(input_feature, forward_tag)
-            new_elements.extend(new_forward_feature)
-            if input_feature.get(self.__JUNCTION_FIELD, None) in self.__JUNCTION_VALUES:
-                return new_elements
+            if attributes.get(self.__JUNCTION_FIELD, None) in self.__JUNCTION_VALUES:
+                return [forward_tag]
 
-            if input_feature.get(self.__ONEWAY_FIELD, None) != self.__ONEWAY_VALUE:
+            if attributes.get(self.__ONEWAY_FIELD, None) != self.__ONEWAY_VALUE:
+                return [forward_tag, backward_tag]
 
-                new_backward_feature = self._direction_processing(
-                    input_feature, backward_tag
-                )
-                new_elements.extend(new_backward_feature)
+            return [forward_tag]
 
         elif self._mode_post_processing == "pedestrian":
             # it's the default behavior
+            return [None]
 
-            feature = self._direction_processing(input_feature)
-            new_elements.extend(feature)
+        return []
 
-        return new_elements
-
-    def _direction_processing(
-        self, input_feature: Dict, direction: Optional[str] = None
-    ):
-        new_features = []
-        input_feature_copy = dict(input_feature)
+    def _lines_processing(self, lines: List[Dict]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        # the output lines are built as flat arrays (1 item by segment and direction), without any feature
+        lines_coords = [
+            np.array(line[self.__COORDINATES_FIELD], dtype=np.float64) for line in lines
+        ]
+        lines_offsets = np.cumsum(
+            [0] + [line_coords.shape[0] for line_coords in lines_coords], dtype=np.int64
+        )
 
-        if self._improve_line_output:
-            new_coords = list(
-                self._split_line(input_feature_copy, self.__INTERPOLATION_LINE_LEVEL)
+        if len(lines) == 0:
+            geometries = np.array([], dtype=object)
+            geometries_offsets = np.zeros(1, dtype=np.int64)
+        elif self._improve_line_output:
+            # all the lines are densified in one call: each sub-segment is a geometry
+            segments, geometries_offsets = interpolate_lines_to_segments(
+                np.concatenate(lines_coords),
+                lines_offsets,
+                self.__INTERPOLATION_LINE_LEVEL,
             )
-            new_lines_coords = list(zip(new_coords, new_coords[1:]))
-            del input_feature_copy[self.__COORDINATES_FIELD]
-
-            for idx, sub_line_coords in enumerate(new_lines_coords):
-                new_features.append(
-                    self.__proceed_direction_geom(
-                        direction, input_feature_copy, sub_line_coords, idx
-                    )
-                )
+            geometries = shapely.linestrings(segments)
         else:
-            new_coords = list(self._split_line(input_feature_copy, 1))
-            del input_feature_copy[self.__COORDINATES_FIELD]
-            new_features.append(
-                self.__proceed_direction_geom(direction, input_feature_copy, new_coords)
+            geometries = shapely.linestrings(
+                np.concatenate(lines_coords),
+                indices=np.repeat(np.arange(len(lines)), np.diff(lines_offsets)),
             )
+            geometries_offsets = np.arange(len(lines) + 1)
 
-        return new_features
-
-    def __proceed_direction_geom(
-        self, direction, input_feature, sub_line_coords, idx=None
-    ):
-        feature = dict(input_feature)
+        lines_directions = list(map(self.mode_processing, lines))
+        directions_found = set(chain.from_iterable(lines_directions))
+        if not directions_found.issubset({forward_tag, backward_tag, None}):
+            raise NetworkTopologyError(f"Direction issue: value '{directions_found}' found")
 
-        if idx is not None:
-            idx = f"_{idx}"
-        else:
-            idx = ""
-
-        if direction == "backward":
-            new_linestring = LineString(sub_line_coords[::-1])
-        elif direction in ["forward", None]:
-            new_linestring = LineString(sub_line_coords)
-        else:
-            raise NetworkTopologyError(f"Direction issue: value '{direction}' found")
-        feature[self.__GEOMETRY_FIELD] = new_linestring
+        # each (line, direction) pair is repeated on the segments of the line
+        pairs_line = np.repeat(
+            np.arange(len(lines)), [len(directions) for directions in lines_directions]
+        )
+        pairs_direction = np.array(
+            list(chain.from_iterable(lines_directions)), dtype=object
+        )
+        pairs_direction_code = np.array(
+            [direction_codes[direction] for direction in pairs_direction.tolist()],
+            dtype=np.int64,
+        )
+        pairs_nb_segments = np.diff(geometries_offsets)[pairs_line]
+        rows_line = np.repeat(pairs_line, pairs_nb_segments)
+        rows_direction = np.repeat(pairs_direction, pairs_nb_segments)
+        rows_segment = np.arange(rows_line.size) - np.repeat(
+            np.cumsum(pairs_nb_segments) - pairs_nb_segments, pairs_nb_segments
+        )
+        rows_geometry = geometries[geometries_offsets[rows_line] + rows_segment]
+        rows_backward = rows_direction == backward_tag
+        rows_geometry[rows_backward] = shapely.reverse(rows_geometry[rows_backward])
+
+        columns = {
+            self.__FIELD_ID: np.array(
+                [line[self.__FIELD_ID] for line in lines], dtype=object
+            )[rows_line],
+            self.__GEOMETRY_FIELD: rows_geometry,
+            self.__CLEANING_FILED_STATUS: np.array(
+                [line[self.__CLEANING_FILED_STATUS] for line in lines], dtype=object
+            )[rows_line],
+            topology_attributes_index: np.array(
+                [line[topology_attributes_index] for line in lines], dtype=np.int64
+            )[rows_line],
+        }
 
-        if direction is not None:
-            feature[self.__FIELD_ID] = f"{feature[self.__FIELD_ID]}{idx}_{direction}"
+        if self._integer_edge_ids:
+            # the id is set when all the lines are built
+            columns[topology_split_field] = np.array(
+                [line[topology_split_field] for line in lines], dtype=np.int64
+            )[rows_line]
+            columns[topology_segment_field] = (
+                rows_segment if self._improve_line_output else np.full(rows_line.size, -1)
+            )
+            columns[topology_direction_field] = np.repeat(
+                pairs_direction_code, pairs_nb_segments
+            )
         else:
-            feature[self.__FIELD_ID] = f"{feature[self.__FIELD_ID]}{idx}"
+            segments_suffix = (
+                [f"_{idx}" for idx in rows_segment.tolist()]
+                if self._improve_line_output
+                else repeat("")
+            )
+            columns[self.__FIELD_ID] = np.array(
+                [
+                    f"{line_id}{segment_suffix}"
+                    + (f"_{direction}" if direction is not None else "")
+                    for line_id, segment_suffix, direction in zip(
+                        columns[self.__FIELD_ID].tolist(),
+                        segments_suffix,
+                        rows_direction.tolist(),
+                    )
+                ],
+                dtype=object,
+            )
 
-        return feature
+        return rows_line, columns
 
-    def _split_line(self, feature: Dict, interpolation_level: int) -> List:
-        new_line_coords = interpolate_curve_based_on_original_points(
-            np.array(feature[self.__COORDINATES_FIELD]), interpolation_level,
-        )
-        return new_line_coords
+    @staticmethod
+    def _columns_to_features(columns: Dict[str, np.ndarray]) -> List[Dict]:
+        columns_names = list(columns.keys())
+        return [
+            dict(zip(columns_names, row))
+            for row in zip(*(column.tolist() for column in columns.values()))
+        ]
 
     def _prepare_data(self):
 
-        self._network_data = {
-            feature[self.__FIELD_ID]: {
-                **{self.__COORDINATES_FIELD: feature[self.__GEOMETRY_FIELD].coords[:]},
-                **feature,
-                **{self.__CLEANING_FILED_STATUS: self.__TOPOLOGY_TAG_UNCHANGED},
+        # lines only keep their topology fields, the other attributes are shared by all the lines of a way
+        network_data = {}
+        for feature in self._network_data:
+            network_data[feature[self.__FIELD_ID]] = {
+                self.__COORDINATES_FIELD: feature[self.__GEOMETRY_FIELD].coords[:],
+                self.__FIELD_ID: feature[self.__FIELD_ID],
+                self.__GEOMETRY_FIELD: feature[self.__GEOMETRY_FIELD],
+                self.__CLEANING_FILED_STATUS: self.__TOPOLOGY_TAG_UNCHANGED,
+                topology_attributes_index: len(self._attributes_table),
             }
-            for feature in self._network_data
-        }
+            self._attributes_table.append(
+                {
+                    key: value
+                    for key, value in feature.items()
+                    if key not in {self.__FIELD_ID, self.__GEOMETRY_FIELD}
+                }
+            )
+        self._network_data = network_data
+
         if self._additional_nodes is not None:
             self._additional_nodes = {
                 feature[self.__FIELD_ID]: {
@@ -343,97 +675,94 @@ class NetworkTopology:
         self.logger.info("Starting: Adding new nodes on the network")
 
         self.logger.info("Find nearest line for each node")
-        node_keys_by_nearest_lines_filled = (
+        node_keys_by_nearest_lines_filled = list(
             self.__find_nearest_line_for_each_key_nodes()
         )
 
         self.logger.info("Split line")
-        # for nearest_line_key in node_keys_by_nearest_lines_filled:
-        #     self.split_line(nearest_line_key)
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.map(self.split_line, node_keys_by_nearest_lines_filled)
-
-        self._network_data: Dict = {**self._network_data, **self.__connections_added}
-
-        self.logger.info(
-            f"Topology lines checker: {', '.join([f'{key}: {value}' for key, value in self.__topology_stats.items()])}"
-        )
-
-    def split_line(self, node_key_by_nearest_lines):
-        nearest_line_content = self.__node_by_nearest_lines[node_key_by_nearest_lines]
-        default_line_updater = self.proceed_nodes_on_network(
-            (node_key_by_nearest_lines, nearest_line_content)
-        )
-        if default_line_updater is not None:
-            self.insert_new_nodes_on_its_line(default_line_updater)
-
-    def insert_new_nodes_on_its_line(self, item):
-        original_line_key = item["original_line_key"]
-        end_points_found = item["end_points_found"]
-
-        linestring_with_new_nodes = self._network_data[original_line_key][
-            self.__COORDINATES_FIELD
+        # gather all the (line, nodes) items as flat arrays
+        lines_coords = [
+            np.array(self._network_data[line_key][self.__COORDINATES_FIELD], dtype=np.float64)
+            for line_key in node_keys_by_nearest_lines_filled
         ]
-        linestring_with_new_nodes.extend(end_points_found)
-        linestring_with_new_nodes = set(linestring_with_new_nodes)
-        self.__topology_stats["to split"] += len(
-            linestring_with_new_nodes.intersection(end_points_found)
+        lines_offsets = np.cumsum(
+            [0] + [line_coords.shape[0] for line_coords in lines_coords], dtype=np.int64
         )
-
-        # build new LineStrings
-        linestring_linked_updated = list(
-            filter(lambda x: x in linestring_with_new_nodes, item["interpolated_line"],)
-        )
-
-        self._network_data[original_line_key][
-            self.__COORDINATES_FIELD
-        ] = linestring_linked_updated
-
-    def proceed_nodes_on_network(self, nearest_line_content):
-        nearest_line_key, node_keys = nearest_line_content
-
-        interpolated_line_coords = interpolate_curve_based_on_original_points(
-            np.array(self._network_data[nearest_line_key][self.__COORDINATES_FIELD]),
-            self.__INTERPOLATION_LEVEL,
+        lines_node_keys = [
+            self.__node_by_nearest_lines[line_key]
+            for line_key in node_keys_by_nearest_lines_filled
+        ]
+        nodes_offsets = np.cumsum(
+            [0] + [len(node_keys) for node_keys in lines_node_keys], dtype=np.int64
         )
-        line_tree = spatial.cKDTree(interpolated_line_coords)
-        interpolated_line_coords_rebuilt = list(map(tuple, interpolated_line_coords))
-
         nodes_coords = [
             self._additional_nodes[node_key][self.__COORDINATES_FIELD]
-            for node_key in node_keys
+            for node_key in chain.from_iterable(lines_node_keys)
         ]
-        _, nearest_line_object_idxes = line_tree.query(nodes_coords)
-        end_points_found = [
-            interpolated_line_coords_rebuilt[nearest_line_key]
-            for nearest_line_key in nearest_line_object_idxes
-        ]
-
-        connections_coords = list(
-            zip(node_keys, list(zip(nodes_coords, end_points_found)))
-        )
-        self.__topology_stats["to add"] += len(connections_coords)
 
-        connections_coords_valid = list(
-            filter(lambda x: len(set(x[-1])) > 0, connections_coords)
+        # the nearest interpolated vertex is found without building the interpolated line
+        locations, projections = project_points_on_lines(
+            np.concatenate(lines_coords),
+            lines_offsets,
+            np.array(nodes_coords, dtype=np.float64),
+            np.repeat(
+                np.arange(len(lines_coords), dtype=np.int64), np.diff(nodes_offsets)
+            ),
+            0 if self._exact_node_projection else 2 ** (self.__INTERPOLATION_LEVEL - 1),
         )
-        for node_key, connection in connections_coords_valid:
+        end_points_found = list(map(tuple, projections.tolist()))
+
+        # merge the results in one step
+        for line_idx, line_key in enumerate(node_keys_by_nearest_lines_filled):
+            line_nodes = slice(nodes_offsets[line_idx], nodes_offsets[line_idx + 1])
+            self._network_data[line_key][
+                self.__COORDINATES_FIELD
+            ] = self._insert_projections_on_line(
+                lines_coords[line_idx], locations[line_nodes], projections[line_nodes]
+            )
+            self.__topology_stats["to split"] += len(set(end_points_found[line_nodes]))
 
+        for node_key, node_coords, end_point in zip(
+            chain.from_iterable(lines_node_keys), nodes_coords, end_points_found
+        ):
             # to split line at node (and also if node is on the network). it builds intersection used to split lines
             # additional are converted to lines
+            connection = (node_coords, end_point)
             self.__connections_added[f"from_node_id_{node_key}"] = {
                 self.__COORDINATES_FIELD: connection,
                 self.__GEOMETRY_FIELD: connection,
                 self.__CLEANING_FILED_STATUS: self.__TOPOLOGY_TAG_ADDED,
                 self.__FIELD_ID: f"{self.__TOPOLOGY_TAG_ADDED}_{node_key}",
-                self._original_field_id: f"{self.__TOPOLOGY_TAG_ADDED}_{node_key}",
+                topology_attributes_index: len(self._attributes_table),
             }
+            self._attributes_table.append(
+                {self._original_field_id: f"{self.__TOPOLOGY_TAG_ADDED}_{node_key}"}
+            )
+        self.__topology_stats["to add"] += len(nodes_coords)
 
-        return {
-            "interpolated_line": interpolated_line_coords_rebuilt,
-            "original_line_key": nearest_line_key,
-            "end_points_found": end_points_found,
-        }
+        self._network_data: Dict = {**self._network_data, **self.__connections_added}
+
+        self.logger.info(
+            f"Topology lines checker: {', '.join([f'{key}: {value}' for key, value in self.__topology_stats.items()])}"
+        )
+
+    @staticmethod
+    def _insert_projections_on_line(
+        line_coords: np.ndarray, locations: np.ndarray, projections: np.ndarray
+    ) -> List[Tuple[float, float]]:
+        # a location without decimal part is an existing vertex: nothing to insert
+        on_segments = np.flatnonzero(locations % 1 != 0)
+        inserted_locations, first_found = np.unique(
+            locations[on_segments], return_index=True
+        )
+        all_locations = np.concatenate(
+            [np.arange(line_coords.shape[0], dtype=np.float64), inserted_locations]
+        )
+        all_coords = np.concatenate([line_coords, projections[on_segments[first_found]]])
+
+        return list(
+            map(tuple, all_coords[np.argsort(all_locations, kind="stable")].tolist())
+        )
 
     def _topology_builder(
         self,
@@ -496,53 +825,33 @@ class NetworkTopology:
 
         return set(intersections_found)
 
-    def __rtree_generator_func(
-        self,
-    ) -> Iterator[Tuple[int, Tuple[str, str, str, float], None]]:
-        for fid, feature in self._network_data.items():
-            # fid is an integer
-            yield fid, feature[self.__GEOMETRY_FIELD].bounds, None
-
     def __find_nearest_line_for_each_key_nodes(self) -> Iterator[int]:
-        # find the nearest network arc to interpolate
-        self.__tree_index = rtree.index.Index(self.__rtree_generator_func())
-
-        # find nearest line
-        self.__node_by_nearest_lines = dict(
-            (key, []) for key in self._network_data.keys()
+        # find the nearest network arc of all the nodes in one bulk query
+        lines_keys = np.array(list(self._network_data.keys()))
+        lines_tree = STRtree(
+            [feature[self.__GEOMETRY_FIELD] for feature in self._network_data.values()]
         )
 
-        # not working because rtree cannot be MultiThreaded
-        # with concurrent.futures.ThreadPoolExecutor(4) as executor:
-        #     executor.map(self.__get_nearest_line, self._additional_nodes.items())
-        for node_info in self._additional_nodes.items():
-            self.__get_nearest_line(node_info)
-
-        node_keys_by_nearest_lines_filled = filter(
-            lambda x: len(self.__node_by_nearest_lines[x]) > 0,
-            self.__node_by_nearest_lines,
+        nodes_keys = list(self._additional_nodes.keys())
+        nodes_idx, lines_idx = lines_tree.query_nearest(
+            [node[self.__GEOMETRY_FIELD] for node in self._additional_nodes.values()],
+            all_matches=True,
         )
 
-        return node_keys_by_nearest_lines_filled
-
-    def __get_nearest_line(self, node_info: Tuple[int, Dict]) -> None:
-        node_uuid, node = node_info
-        distances_computed: List[Tuple[float, int]] = []
-        node_geom = node[self.__GEOMETRY_FIELD]
+        # equidistant lines are all returned: keep the lowest line key for each node (deterministic)
+        nodes_lines_order = np.lexsort((lines_keys[lines_idx], nodes_idx))
+        _, first_matches = np.unique(nodes_idx[nodes_lines_order], return_index=True)
+        nodes_lines_found = nodes_lines_order[first_matches]
 
-        for index_feature in self.__tree_index.nearest(
-            node_geom.bounds, self.__NB_OF_NEAREST_LINE_ELEMENTS_TO_FIND
+        self.__node_by_nearest_lines = {}
+        for node_idx, line_idx in zip(
+            nodes_idx[nodes_lines_found].tolist(), lines_idx[nodes_lines_found].tolist()
         ):
-            line_geom = self._network_data[index_feature][self.__GEOMETRY_FIELD]
-            distance_from_node_to_line = node_geom.distance(line_geom)
-            if distance_from_node_to_line == 0:
-                # means that we node is on the network, looping is not necessary anymore
-                distances_computed = [(distance_from_node_to_line, index_feature)]
-                break
-            distances_computed.append((distance_from_node_to_line, index_feature))
+            self.__node_by_nearest_lines.setdefault(
+                lines_keys[line_idx].item(), []
+            ).append(nodes_keys[node_idx])
 
-        _, line_min_index = min(distances_computed)
-        self.__node_by_nearest_lines[line_min_index].append(node_uuid)
+        return iter(self.__node_by_nearest_lines)
 
     @staticmethod
     def _check_inputs(inputs: List[Dict]) -> List[Dict]:
@@ -566,28 +875,203 @@ class NetworkTopology:
         return list_object
 
 
-signature_interpolation_func = nb_types.Array(nb_types.float64, 2, "C")(
-    nb_types.Array(nb_types.float64, 2, "C"), nb_types.int64
+def find_intersections_from_coordinates(
+    coordinates: np.ndarray, nb_of_nodes: int
+) -> np.ndarray:
+    unique_coordinates, counts = np.unique(coordinates, axis=0, return_counts=True)
+    return unique_coordinates[counts >= nb_of_nodes]
+
+
+def build_lines_from_features(
+    topology_params: Tuple,
+    features: List[Dict],
+    attributes: Dict[int, Dict],
+    intersections: Set[Tuple[float, float]],
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    (
+        logger,
+        uuid_field,
+        original_field_id,
+        mode_post_processing,
+        improve_line_output,
+        integer_edge_ids,
+    ) = topology_params
+    network_topology = NetworkTopology(
+        logger,
+        features,
+        None,
+        uuid_field,
+        original_field_id,
+        mode_post_processing,
+        improve_line_output,
+        integer_edge_ids=integer_edge_ids,
+    )
+    network_topology._attributes_table = attributes
+    network_topology._intersections_found = intersections
+
+    features_lines = list(map(network_topology.build_lines, features))
+    rows_line, columns = network_topology._lines_processing(
+        list(chain.from_iterable(features_lines))
+    )
+    lines_feature = np.repeat(
+        np.arange(len(features_lines)),
+        [len(feature_lines) for feature_lines in features_lines],
+    )
+
+    # the rows are returned with the position of their feature on the tile
+    return lines_feature[rows_line], columns
+
+
+signature_interpolation_func = nb_types.Tuple(
+    (nb_types.Array(nb_types.float64, 3, "C"), nb_types.Array(nb_types.int64, 1, "C"))
+)(
+    nb_types.Array(nb_types.float64, 2, "C"),
+    nb_types.Array(nb_types.int64, 1, "C"),
+    nb_types.int64,
 )
 
 
-@jit(signature_interpolation_func, nopython=True, nogil=True, cache=True)
-def interpolate_curve_based_on_original_points(x, n):
-    # source :
-    # https://stackoverflow.com/questions/31243002/higher-order-local-interpolation-of-implicit-curves-in-python/31335255
-    if n > 1:
-        m = 0.5 * (x[:-1] + x[1:])
-        if x.ndim == 2:
-            m_size = (x.shape[0] + m.shape[0], x.shape[1])
+@jit(signature_interpolation_func, nopython=True, nogil=True, parallel=True, cache=True)
+def interpolate_lines_to_segments(x, offsets, n):
+    # x contains the coordinates of all the lines, line i is x[offsets[i]:offsets[i + 1]]
+    # each segment is cut in 2 ** (n - 1) parts (as many vertices than a midpoint interpolation with n levels)
+    # returns the sub-segments (nb of sub-segments, 2 points, 2 coordinates) and the sub-segments offsets of each line
+    subdivisions = 2 ** (n - 1)
+    nb_lines = offsets.shape[0] - 1
+
+    segments_offsets = np.zeros(nb_lines + 1, dtype=np.int64)
+    for line_idx in range(nb_lines):
+        nb_segments = max(offsets[line_idx + 1] - offsets[line_idx] - 1, 0)
+        segments_offsets[line_idx + 1] = segments_offsets[line_idx] + nb_segments * subdivisions
+
+    segments = np.empty((segments_offsets[nb_lines], 2, 2), dtype=np.float64)
+    for line_idx in prange(nb_lines):
+        segment_idx = segments_offsets[line_idx]
+        for vertex_idx in range(offsets[line_idx], offsets[line_idx + 1] - 1):
+            ax = x[vertex_idx, 0]
+            ay = x[vertex_idx, 1]
+            dx = x[vertex_idx + 1, 0] - ax
+            dy = x[vertex_idx + 1, 1] - ay
+
+            # original vertices are kept as they are, to keep the network connected
+            segments[segment_idx, 0, 0] = ax
+            segments[segment_idx, 0, 1] = ay
+            for part_idx in range(1, subdivisions):
+                position = part_idx / subdivisions
+                segments[segment_idx, 1, 0] = ax + position * dx
+                segments[segment_idx, 1, 1] = ay + position * dy
+                segments[segment_idx + 1, 0, 0] = segments[segment_idx, 1, 0]
+                segments[segment_idx + 1, 0, 1] = segments[segment_idx, 1, 1]
+                segment_idx += 1
+            segments[segment_idx, 1, 0] = x[vertex_idx + 1, 0]
+            segments[segment_idx, 1, 1] = x[vertex_idx + 1, 1]
+            segment_idx += 1
+
+    return segments, segments_offsets
+
+
+signature_snapping_func = nb_types.Array(nb_types.float64, 2, "C")(
+    nb_types.Array(nb_types.float64, 2, "C"),
+    nb_types.Array(nb_types.int64, 2, "C"),
+    nb_types.int64,
+    nb_types.Array(nb_types.int64, 1, "C"),
+    nb_types.Array(nb_types.int64, 1, "C"),
+    nb_types.float64,
+)
+
+
+@jit(signature_snapping_func, nopython=True, nogil=True, cache=True)
+def snap_coordinates_on_grid(x, cells, nb_cells_rows, sorted_keys, sorted_idx, tolerance):
+    # each vertex is moved on the first previous vertex kept at a distance <= tolerance, found on its cell
+    # or on the 8 neighbour cells (cell key: cell_x * nb_cells_rows + cell_y, sorted_keys[i] is the key of
+    # x[sorted_idx[i]]). If nothing is found, the vertex is kept
+    snapped = x.copy()
+    is_kept = np.zeros(x.shape[0], dtype=np.bool_)
+    squared_tolerance = tolerance * tolerance
+
+    for vertex_idx in range(x.shape[0]):
+        vertex_found = -1
+        for cell_x in range(cells[vertex_idx, 0] - 1, cells[vertex_idx, 0] + 2):
+            for cell_y in range(cells[vertex_idx, 1] - 1, cells[vertex_idx, 1] + 2):
+                cell_key = cell_x * nb_cells_rows + cell_y
+                cell_start = np.searchsorted(sorted_keys, cell_key)
+                cell_end = np.searchsorted(sorted_keys, cell_key, side="right")
+                for other_idx in sorted_idx[cell_start:cell_end]:
+                    if other_idx >= vertex_idx or not is_kept[other_idx]:
+                        continue
+                    if vertex_found != -1 and other_idx > vertex_found:
+                        continue
+                    distance = (x[vertex_idx, 0] - x[other_idx, 0]) ** 2 + (
+                        x[vertex_idx, 1] - x[other_idx, 1]
+                    ) ** 2
+                    if distance <= squared_tolerance:
+                        vertex_found = other_idx
+
+        if vertex_found == -1:
+            is_kept[vertex_idx] = True
         else:
-            raise NotImplementedError
-        x_new = np.empty(m_size, dtype=x.dtype)
-        x_new[0::2] = x
-        x_new[1::2] = m
-        return interpolate_curve_based_on_original_points(x_new, n - 1)
+            snapped[vertex_idx, 0] = x[vertex_found, 0]
+            snapped[vertex_idx, 1] = x[vertex_found, 1]
+
+    return snapped
+
+
+signature_projection_func = nb_types.Tuple(
+    (nb_types.Array(nb_types.float64, 1, "C"), nb_types.Array(nb_types.float64, 2, "C"))
+)(
+    nb_types.Array(nb_types.float64, 2, "C"),
+    nb_types.Array(nb_types.int64, 1, "C"),
+    nb_types.Array(nb_types.float64, 2, "C"),
+    nb_types.Array(nb_types.int64, 1, "C"),
+    nb_types.int64,
+)
+
+
+@jit(signature_projection_func, nopython=True, nogil=True, parallel=True, cache=True)
+def project_points_on_lines(x, offsets, points, points_lines, subdivisions):
+    # x contains the coordinates of all the lines, line i is x[offsets[i]:offsets[i + 1]]
+    # for each point: locate (segment index + position on the segment) and interpolate its projection on
+    # its line (points_lines). An integer location means that the projection is an existing vertex.
+    # With subdivisions > 0, the position is rounded to the nearest vertex of the segment cut in subdivisions parts
+    locations = np.empty(points.shape[0], dtype=np.float64)
+    projections = np.empty((points.shape[0], 2), dtype=np.float64)
+
+    for point_idx in prange(points.shape[0]):
+        px = points[point_idx, 0]
+        py = points[point_idx, 1]
+        line_start = offsets[points_lines[point_idx]]
+        line_end = offsets[points_lines[point_idx] + 1]
+        min_distance = np.inf
+
+        for vertex_idx in range(line_start, line_end - 1):
+            ax = x[vertex_idx, 0]
+            ay = x[vertex_idx, 1]
+            dx = x[vertex_idx + 1, 0] - ax
+            dy = x[vertex_idx + 1, 1] - ay
+
+            squared_length = dx * dx + dy * dy
+            position = 0.0
+            if squared_length > 0:
+                position = ((px - ax) * dx + (py - ay) * dy) / squared_length
+                position = min(max(position, 0.0), 1.0)
+                if subdivisions > 0:
+                    position = np.floor(position * subdivisions + 0.5) / subdivisions
+
+            if position == 0:
+                qx = ax
+                qy = ay
+            elif position == 1:
+                qx = x[vertex_idx + 1, 0]
+                qy = x[vertex_idx + 1, 1]
+            else:
+                qx = ax + position * dx
+                qy = ay + position * dy
 
-    elif n == 1:
-        return x
+            distance = (px - qx) ** 2 + (py - qy) ** 2
+            if distance < min_distance:
+                min_distance = distance
+                locations[point_idx] = vertex_idx - line_start + position
+                projections[point_idx, 0] = qx
+                projections[point_idx, 1] = qy
 
-    else:
-        raise ValueError
+    return locations, projections
@@ -20,6 +20,13 @@ backward_tag: str = "backward"
 
 # topology
 topology_fields: List[str] = ["topo_uuid", "id", "topology", "osm_url", "geometry"]
+topology_attributes_index: str = "attributes_idx"
+# structured fields of the integer edge ids
+topology_way_field: str = "topo_way"
+topology_split_field: str = "topo_split"
+topology_segment_field: str = "topo_segment"
+topology_direction_field: str = "topo_direction"
+direction_codes: Dict = {None: 0, forward_tag: 1, backward_tag: 2}
 
 # POIs overpass query
 poi_query: str = (
@@ -115,4 +122,18 @@ isochrone_display_mode: Dict = {
     "cap_style": 2,
     "join_style": 1,
     "resolution": 2,
+    "raster_cell_size": 0.0001,
+    "concave_hull_ratio": 0.3,
+}
+
+# same parameters in meters, for the isochrones built on a local metric crs
+isochrone_display_mode_metric: Dict = {
+    "path_buffered": 5,
+    "dilatation": 100,
+    "erosion": -100,
+    "cap_style": 2,
+    "join_style": 1,
+    "resolution": 2,
+    "raster_cell_size": 10,
+    "concave_hull_ratio": 0.3,
 }
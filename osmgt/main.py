@@ -7,6 +7,8 @@ from osmgt.compoments.poi import OsmGtPoi
 from osmgt.processing.isochrone import OsmGtIsochrone
 from osmgt.processing.shortest_path import OsmGtShortestPath
 
+from typing import Dict
+from typing import Iterator
 from typing import Tuple
 from typing import List
 from typing import Optional
@@ -100,6 +102,8 @@ class OsmGt:
         isochrones_times: List[Union[int, float]],
         trip_speed: float,
         mode: str = "pedestrian",
+        partial_edges: bool = False,
+        polygon_method: str = "buffer",
     ) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
         """
         :param source_nodes: location points
@@ -110,6 +114,11 @@ class OsmGt:
         :type trip_speed: int
         :param mode: the transport mode
         :type mode: str, default 'pedestrian', one of : pedestrian, vehicle
+        :param partial_edges: to cut the roads at the isochrones limits (instead of densifying them)
+        :type partial_edges: bool, default False
+        :param polygon_method: isochrone polygon builder, one of: buffer, raster, concave_hull
+            (see osmgt.geometry.isochrone_polygon.build_isochrone_polygon)
+        :type polygon_method: str, default 'buffer'
         :return: 2 GeoDataframe : isochrones polygons and isochrones lines (roads)
         :rtype: tuple(geopandas.GeoDataFrame)
         """
@@ -119,7 +128,10 @@ class OsmGt:
             raise OsmgGtLimit(f"Minimal distance must be >= {min_time} minutes")
 
         isochrone_polygons_gdf, isochrone_lines_gdf = OsmGtIsochrone(
-            trip_speed, isochrones_times
+            trip_speed,
+            isochrones_times,
+            partial_edges=partial_edges,
+            polygon_method=polygon_method,
         ).from_location_points(source_nodes, mode)
 
         return isochrone_polygons_gdf, isochrone_lines_gdf
@@ -130,6 +142,8 @@ class OsmGt:
         distances: List[Union[int, float]],
         trip_speed: float,
         mode: str = "pedestrian",
+        partial_edges: bool = False,
+        polygon_method: str = "buffer",
     ) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
         """
         :param source_nodes: location points
@@ -140,6 +154,11 @@ class OsmGt:
         :type trip_speed: int
         :param mode: the transport mode
         :type mode: str, default 'pedestrian', one of : pedestrian, vehicle
+        :param partial_edges: to cut the roads at the isochrones limits (instead of densifying them)
+        :type partial_edges: bool, default False
+        :param polygon_method: isochrone polygon builder, one of: buffer, raster, concave_hull
+            (see osmgt.geometry.isochrone_polygon.build_isochrone_polygon)
+        :type polygon_method: str, default 'buffer'
         :return: 2 GeoDataframe : isochrones polygons and isochrones lines (roads)
         :rtype: tuple(geopandas.GeoDataFrame)
         """
@@ -148,11 +167,52 @@ class OsmGt:
             raise OsmgGtLimit(f"Minimal distance must be >= {min_distance} meters")
 
         isochrone_polygons_gdf, isochrone_lines_gdf = OsmGtIsochrone(
-            trip_speed, None, distances
+            trip_speed,
+            None,
+            distances,
+            partial_edges=partial_edges,
+            polygon_method=polygon_method,
         ).from_location_points(source_nodes, mode)
 
         return isochrone_polygons_gdf, isochrone_lines_gdf
 
+    @staticmethod
+    def isochrone_times_by_origin(
+        source_nodes: List[Point],
+        isochrones_times: List[Union[int, float]],
+        trip_speed: float,
+        mode: str = "pedestrian",
+        output_file: Optional[str] = None,
+        workers: Optional[int] = None,
+        polygon_method: str = "buffer",
+    ) -> Optional[Iterator[Dict]]:
+        """
+        :param source_nodes: location points, an isochrone is computed for each of them
+        :type source_nodes: shapely.geometry.Point
+        :param isochrones_times: isochrones to build (in minutes)
+        :type isochrones_times: list of int
+        :param trip_speed: trip speed in km/h
+        :type trip_speed: int
+        :param mode: the transport mode
+        :type mode: str, default 'pedestrian', one of : pedestrian, vehicle
+        :param output_file: GeoJSON sequence file to write the isochrones (nothing is returned)
+        :type output_file: str, default None
+        :param workers: number of processes
+        :type workers: int, default None (number of cpus)
+        :param polygon_method: isochrone polygon builder, one of: buffer, raster, concave_hull
+        :type polygon_method: str, default 'buffer'
+        :return: the isochrones rows, by source node
+        :rtype: iterator of dict
+        """
+
+        min_time = 1
+        if min(isochrones_times) < min_time:
+            raise OsmgGtLimit(f"Minimal distance must be >= {min_time} minutes")
+
+        return OsmGtIsochrone(
+            trip_speed, isochrones_times, polygon_method=polygon_method
+        ).from_location_points_by_origin(source_nodes, mode, output_file, workers)
+
     @staticmethod
     def shortest_path_from_location(
         location_name: str,
@@ -1,9 +1,18 @@
 from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
 from typing import Tuple
 
+import numpy as np
+
+import shapely
+
+from scipy.spatial import cKDTree
+
 from graph_tool import Graph
+from graph_tool.topology import label_components
+from graph_tool.topology import shortest_distance
 from graph_tool.all import graph_draw
 from graph_tool.draw import sfdp_layout
 
@@ -30,31 +39,52 @@ class GraphHelpers(Graph):
     - find_edge_from_vertices_name()
     - edge_exists_from_vertices_name()
     - find_edges_from_vertex()
+    - find_edges_from_reached_vertices()
     - find_vertex_names_from_edge_name()
+    - contract_degree_2_vertices()
+    - component_labels
+    - same_component()
+    - keep_largest_components()
+    - multi_source_shortest_distance()
+    - nearest_vertices()
+    - add_temporary_vertex()
+    - remove_temporary_vertices()
     """
 
     __slots__ = (
         "_logger",
+        "_integer_edge_names",
         "vertex_names",
         "edge_names",
         "edge_weights",
         "vertices_content",
         "edges_content",
         "edges_vertices_content",
+        "_component_labels",
+        "_temporary_vertices",
+        "_temporary_splits",
+        "_vertices_tree",
     )
 
-    def __init__(self, logger, is_directed: bool = True) -> None:
+    def __init__(
+        self, logger, is_directed: bool = True, integer_edge_names: bool = False
+    ) -> None:
         """
         :param logger: logger
         :type logger:
         :param is_directed: is directed or not
         :type is_directed: bool
+        :param integer_edge_names: to name edges with integers (int64 property map) instead of strings
+        :type integer_edge_names: bool
         """
         super(GraphHelpers, self).__init__(directed=is_directed)
 
         self._logger = logger
+        self._integer_edge_names = integer_edge_names
         self.vertex_names = self.new_vertex_property("string")
-        self.edge_names = self.new_edge_property("string")
+        self.edge_names = self.new_edge_property(
+            "int64_t" if integer_edge_names else "string"
+        )
 
         self.edge_weights = self.new_edge_property("double")
 
@@ -62,6 +92,13 @@ class GraphHelpers(Graph):
         self.edges_content: Dict = {}
         self.edges_vertices_content: Dict = {}
 
+        self._component_labels: Optional[np.ndarray] = None
+
+        self._temporary_vertices: List[int] = []
+        self._temporary_splits: Dict = {}
+
+        self._vertices_tree: Optional[cKDTree] = None
+
     def find_edges_from_vertex(self, vertex_name: str) -> List[str]:
         vertex = self.find_vertex_from_name(vertex_name)
         if vertex is not None:
@@ -73,6 +110,20 @@ class GraphHelpers(Graph):
             else:
                 raise ErrorGraphHelpers("Seems impossible ?")
 
+    def find_edges_from_reached_vertices(self, vertices_reached: np.ndarray) -> np.ndarray:
+        """
+        Find the edges whose source and target vertices are both reached
+
+        :param vertices_reached: boolean mask of the reached vertices (by vertex index)
+        :type vertices_reached: numpy.ndarray
+        :return: edge indexes (with integer edge names, use edge_names.a[edge indexes] to get the names)
+        :rtype: numpy.ndarray
+        """
+        edges = self.get_edges([self.edge_index])
+        edges_found = vertices_reached[edges[:, 0]] & vertices_reached[edges[:, 1]]
+
+        return edges[edges_found, 2]
+
     def find_vertex_names_from_edge_name(
         self, edge_name: str
     ) -> Optional[Tuple[str, str]]:
@@ -112,6 +163,8 @@ class GraphHelpers(Graph):
         vertex = super(GraphHelpers, self).add_vertex()
         self.vertex_names[vertex] = vertex_name
         self.vertices_content[vertex_name] = vertex
+        self._component_labels = None
+        self._vertices_tree = None
 
         return vertex
 
@@ -130,7 +183,7 @@ class GraphHelpers(Graph):
         :param target_vertex_name: target vertex name
         :type target_vertex_name: str
         :param edge_name: edge name
-        :type edge_name: str
+        :type edge_name: str or int (see integer_edge_names)
         :param weight: weight value
         :type weight: float, default None
         :return: Edge object
@@ -150,6 +203,7 @@ class GraphHelpers(Graph):
                 target = self.add_vertex(target_vertex_name)
 
             edge = super(GraphHelpers, self).add_edge(source, target)
+            self._component_labels = None
             self.edge_names[edge] = edge_name
             self.edges_content[edge_name] = edge
             self.edges_vertices_content[edge_name] = frozenset(
@@ -166,8 +220,6 @@ class GraphHelpers(Graph):
 
             return None
 
-
-
     def find_edge_from_name(self, edge_name: str):
         """
         Find an edge
@@ -178,6 +230,8 @@ class GraphHelpers(Graph):
         :rtype: graph_tool.libgraph_tool_core.Edge
         """
         try:
+            if self._integer_edge_names:
+                return self.edges_content[edge_name]
             return self.edges_content[str(edge_name)]
         except KeyError:
             return None
@@ -259,6 +313,376 @@ class GraphHelpers(Graph):
 
         return self.find_vertex_from_name(vertex_name) is not None
 
+    def contract_degree_2_vertices(
+        self, protected_vertex_names: Optional[Iterable[str]] = None
+    ) -> Tuple["GraphHelpers", Dict]:
+        """
+        Build a routing graph where the chains of degree-2 vertices are collapsed into single edges: each
+        contracted edge is named with the name of its first edge and its weight is the sum of the chain weights
+
+        :param protected_vertex_names: vertex names to keep (ex: the sources and targets of a routing)
+        :type protected_vertex_names: iterable of str, default None
+        :return: the contracted graph and, for each contracted edge name, the original edge names (path order)
+        :rtype: tuple of GraphHelpers and dict
+        """
+        self._logger.info("Contract degree-2 vertices")
+        protected_vertex_names = set(
+            protected_vertex_names if protected_vertex_names is not None else []
+        )
+
+        vertex_names = [self.vertex_names[vertex] for vertex in self.vertices()]
+        edges = [
+            (
+                int(edge.source()),
+                int(edge.target()),
+                self.edge_names[edge],
+                self.edge_weights[edge],
+            )
+            for edge in self.edges()
+        ]
+
+        # (neighbour vertex, edge position) reachable from each vertex
+        out_neighbours = [[] for _ in vertex_names]
+        in_neighbours = [[] for _ in vertex_names]
+        for edge_position, (source, target, *_) in enumerate(edges):
+            out_neighbours[source].append((target, edge_position))
+            in_neighbours[target].append(source)
+            if not self.is_directed():
+                out_neighbours[target].append((source, edge_position))
+                in_neighbours[source].append(target)
+
+        is_chain_vertex = [
+            vertex_name not in protected_vertex_names
+            and self.__is_chain_vertex(
+                vertex_idx, out_neighbours[vertex_idx], in_neighbours[vertex_idx]
+            )
+            for vertex_idx, vertex_name in enumerate(vertex_names)
+        ]
+
+        contracted_graph = GraphHelpers(
+            self._logger,
+            is_directed=self.is_directed(),
+            integer_edge_names=self._integer_edge_names,
+        )
+        contracted_edges: Dict = {}
+        edges_visited = [False] * len(edges)
+
+        def walk_from(start_vertex: int) -> None:
+            for next_vertex, edge_position in out_neighbours[start_vertex]:
+                if edges_visited[edge_position]:
+                    continue
+                chain_edges = [edge_position]
+                edges_visited[edge_position] = True
+                previous_vertex, current_vertex = start_vertex, next_vertex
+                while is_chain_vertex[current_vertex]:
+                    next_vertex, edge_position = next(
+                        (neighbour, position)
+                        for neighbour, position in out_neighbours[current_vertex]
+                        if neighbour != previous_vertex
+                    )
+                    chain_edges.append(edge_position)
+                    edges_visited[edge_position] = True
+                    previous_vertex, current_vertex = current_vertex, next_vertex
+
+                edge_name = edges[chain_edges[0]][2]
+                contracted_graph.add_edge(
+                    vertex_names[start_vertex],
+                    vertex_names[current_vertex],
+                    edge_name,
+                    sum(edges[position][3] for position in chain_edges),
+                )
+                contracted_edges[edge_name] = [
+                    edges[position][2] for position in chain_edges
+                ]
+
+        for vertex_idx, is_chain in enumerate(is_chain_vertex):
+            if not is_chain:
+                walk_from(vertex_idx)
+
+        # remaining edges are on closed loops only made of chain vertices: one vertex of each loop is kept
+        for edge_position, (source, *_) in enumerate(edges):
+            if not edges_visited[edge_position]:
+                is_chain_vertex[source] = False
+                walk_from(source)
+
+        self._logger.info(
+            f"Graph contracted: {len(edges)} edges to {len(contracted_edges)} edges"
+        )
+        return contracted_graph, contracted_edges
+
+    @staticmethod
+    def __is_chain_vertex(
+        vertex_idx: int, out_neighbours: List[Tuple[int, int]], in_neighbours: List[int]
+    ) -> bool:
+        # a vertex can be contracted if it links exactly 2 other vertices, each one only once by direction,
+        # and if each edge entering from one neighbour can continue to the other one
+        out_vertices = [neighbour for neighbour, _ in out_neighbours]
+        neighbours = set(out_vertices).union(in_neighbours)
+        if (
+            len(neighbours) != 2
+            or vertex_idx in neighbours
+            or len(set(out_vertices)) != len(out_vertices)
+            or len(set(in_neighbours)) != len(in_neighbours)
+        ):
+            return False
+
+        return set(in_neighbours) == {
+            next(iter(neighbours - {neighbour})) for neighbour in out_vertices
+        }
+
+    @property
+    def component_labels(self) -> np.ndarray:
+        """
+        Component label of each vertex (by vertex index), computed once until the graph changes. Components
+        are weakly connected: 2 vertices in different components can't be linked by a path
+
+        :return: component labels
+        :rtype: numpy.ndarray
+        """
+        if self._component_labels is None:
+            labels, _ = label_components(self, directed=False)
+            self._component_labels = labels.a.copy()
+
+        return self._component_labels
+
+    def nearest_vertices(
+        self, points: Iterable, k: int = 1, max_dist: float = np.inf
+    ) -> np.ndarray:
+        """
+        Find the nearest vertices of points, with a KD-tree over the vertex coordinates (vertex names must be
+        WKT points). The tree is built on the first call, then rebuilt once the vertices change; temporary
+        vertices are ignored
+
+        :param points: points
+        :type points: iterable of shapely.geometry.Point
+        :param k: number of vertices to find by point
+        :type k: int, default 1
+        :param max_dist: maximum distance (crs unit of the vertices) of the vertices found
+        :type max_dist: float, default inf
+        :return: vertex indexes, shape (points,) if k is 1 else (points, k), -1 if not found
+        :rtype: numpy.ndarray
+        """
+        if self._vertices_tree is None:
+            nb_vertices = self.num_vertices() - len(self._temporary_vertices)
+            vertex_names = [self.vertex_names[vertex] for vertex in self.vertices()]
+            self._vertices_tree = cKDTree(
+                shapely.get_coordinates(shapely.from_wkt(vertex_names[:nb_vertices]))
+            )
+
+        _, vertices_idx = self._vertices_tree.query(
+            shapely.get_coordinates(np.asarray(points, dtype=object)),
+            k=k,
+            distance_upper_bound=max_dist,
+        )
+        # vertices not found are set to the number of vertices
+        return np.where(vertices_idx == self._vertices_tree.n, -1, vertices_idx)
+
+    def same_component(self, source_vertex_name: str, target_vertex_name: str) -> bool:
+        """
+        Check if 2 vertices are on the same component
+
+        :param source_vertex_name: source vertex name
+        :type source_vertex_name: str
+        :param target_vertex_name: target vertex name
+        :type target_vertex_name: str
+        :return: if the vertices are on the same component
+        :rtype: bool
+        """
+        source_vertex = self.find_vertex_from_name(source_vertex_name)
+        target_vertex = self.find_vertex_from_name(target_vertex_name)
+
+        if source_vertex is None or target_vertex is None:
+            return False
+
+        component_labels = self.component_labels
+        return (
+            component_labels[int(source_vertex)] == component_labels[int(target_vertex)]
+        )
+
+    def keep_largest_components(self, nb_components: int = 1) -> int:
+        """
+        Remove the vertices (and their edges) which are not on the largest components
+
+        :param nb_components: number of components to keep
+        :type nb_components: int, default 1
+        :return: number of vertices removed
+        :rtype: int
+        """
+        assert nb_components > 0, "nb_components must be greater than 0"
+
+        component_labels = self.component_labels
+        components_size = np.bincount(component_labels)
+        components_kept = np.argsort(components_size, kind="stable")[::-1][:nb_components]
+        vertices_kept = np.isin(component_labels, components_kept)
+        nb_vertices_removed = int(vertices_kept.size - vertices_kept.sum())
+
+        if nb_vertices_removed > 0:
+            vertices_filter = self.new_vertex_property("bool")
+            vertices_filter.a = vertices_kept
+            self.set_vertex_filter(vertices_filter)
+            self.purge_vertices()
+            self.set_vertex_filter(None)
+
+            # vertices and edges are reindexed
+            self.vertices_content = {
+                self.vertex_names[vertex]: vertex for vertex in self.vertices()
+            }
+            self.edges_content = {}
+            self.edges_vertices_content = {}
+            for edge in self.edges():
+                edge_name = self.edge_names[edge]
+                self.edges_content[edge_name] = edge
+                self.edges_vertices_content[edge_name] = frozenset(
+                    [self.vertex_names[edge.source()], self.vertex_names[edge.target()]]
+                )
+            self._component_labels = None
+            self._vertices_tree = None
+
+        self._logger.info(
+            f"{nb_components} largest component(s) kept: {nb_vertices_removed} vertices removed"
+        )
+        return nb_vertices_removed
+
+    def multi_source_shortest_distance(
+        self, source_vertex_names: List[str], max_dist: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the distance from the nearest source of each vertex with one search: a temporary super source
+        is linked to all the sources with zero-weight edges
+
+        :param source_vertex_names: source vertex names
+        :type source_vertex_names: list of str
+        :param max_dist: distance limit of the search
+        :type max_dist: float, default None
+        :return: distances (inf if not reached) and nearest source positions in source_vertex_names
+            (-1 if not reached), by vertex index
+        :rtype: tuple of numpy.ndarray
+        """
+        sources_idx = np.array(
+            [int(self.find_vertex_from_name(name)) for name in source_vertex_names],
+            dtype=np.int64,
+        )
+
+        # the super source is unnamed (base graph methods): it's the last vertex, so its removal does not
+        # reindex the other vertices
+        super_source = Graph.add_vertex(self)
+        for source_idx in sources_idx:
+            edge = Graph.add_edge(self, super_source, self.vertex(source_idx))
+            # set explicitly: a freed edge index can be reused and keep its previous weight
+            self.edge_weights[edge] = 0.0
+        try:
+            distances, predecessors, reached = shortest_distance(
+                self,
+                source=super_source,
+                weights=self.edge_weights,
+                max_dist=max_dist,
+                pred_map=True,
+                return_reached=True,
+            )
+            distances = distances.a.copy()
+            predecessors = predecessors.a.copy()
+        finally:
+            Graph.remove_vertex(self, super_source)
+
+        super_source_idx = distances.size - 1
+        distances = distances[:super_source_idx]
+        vertices_reached = np.zeros(distances.size, dtype=bool)
+        vertices_reached[reached[reached != super_source_idx]] = True
+        distances[~vertices_reached] = np.inf
+
+        # pointer jumping on the predecessors: each vertex ends on the source of its path
+        nearest_sources = predecessors[:super_source_idx]
+        nearest_sources[sources_idx] = sources_idx
+        while True:
+            nearest_sources_next = nearest_sources[nearest_sources]
+            if np.array_equal(nearest_sources_next, nearest_sources):
+                break
+            nearest_sources = nearest_sources_next
+
+        sources_position = np.full(distances.size, -1, dtype=np.int64)
+        sources_position[sources_idx] = np.arange(sources_idx.size)
+        nearest_sources = sources_position[nearest_sources]
+        nearest_sources[~vertices_reached] = -1
+
+        return distances, nearest_sources
+
+    def add_temporary_vertex(
+        self, edges_fraction: List[Tuple[str, float]], connector_weight: float = 0.0
+    ) -> Tuple[int, Dict[int, Tuple[int, float, float]]]:
+        """
+        Add a temporary vertex on edges without rebuilding the graph: each edge is split virtually by a
+        temporary vertex and 2 temporary half-edges (the edge is kept), then the split vertices are linked to the
+        new vertex with connector edges. Temporary vertices are unnamed and must be removed with
+        remove_temporary_vertices() before any other graph change (component_labels ignores them)
+
+        :param edges_fraction: edge names and the split position on each one (0: edge source, 1: edge target)
+        :type edges_fraction: list of tuple (str or int, float)
+        :param connector_weight: weight of the connector edges (ex: the distance between a point and the edges)
+        :type connector_weight: float, default 0.0
+        :return: the new vertex index and the temporary edges: edge index to (original edge index, start
+            fraction, end fraction), the original edge index of the connectors is -1
+        :rtype: tuple of int and dict
+        """
+        temporary_edges: Dict = {}
+
+        def add_temporary_edge(source, target, weight, original_edge_idx, start, end) -> None:
+            edge = Graph.add_edge(self, source, target)
+            self.edge_weights[edge] = weight
+            temporary_edges[int(self.edge_index[edge])] = (original_edge_idx, start, end)
+
+        # unnamed vertices (base graph methods): they are the last ones, so their removal does not reindex the
+        # other vertices
+        vertex = Graph.add_vertex(self)
+        self._temporary_vertices.append(int(vertex))
+
+        for edge_name, fraction in edges_fraction:
+            edge = self.find_edge_from_name(edge_name)
+            edge_idx = int(self.edge_index[edge])
+            weight = self.edge_weights[edge]
+
+            split_vertex = Graph.add_vertex(self)
+            self._temporary_vertices.append(int(split_vertex))
+            add_temporary_edge(
+                edge.source(), split_vertex, weight * fraction, edge_idx, 0.0, fraction
+            )
+            add_temporary_edge(
+                split_vertex, edge.target(), weight * (1 - fraction), edge_idx, fraction, 1.0
+            )
+
+            # the splits already on the edge are linked (ex: source and target of a path on the same edge)
+            for other_fraction, other_split_vertex in self._temporary_splits.setdefault(
+                edge_idx, []
+            ):
+                start, end = sorted([other_fraction, fraction])
+                add_temporary_edge(
+                    *(
+                        (other_split_vertex, split_vertex)
+                        if other_fraction <= fraction
+                        else (split_vertex, other_split_vertex)
+                    ),
+                    weight * (end - start),
+                    edge_idx,
+                    start,
+                    end,
+                )
+            self._temporary_splits[edge_idx].append((fraction, split_vertex))
+
+            add_temporary_edge(vertex, split_vertex, connector_weight, -1, 0.0, 0.0)
+            if self.is_directed():
+                add_temporary_edge(split_vertex, vertex, connector_weight, -1, 0.0, 0.0)
+
+        return int(vertex), temporary_edges
+
+    def remove_temporary_vertices(self) -> None:
+        """
+        Remove the temporary vertices and their edges (see add_temporary_vertex())
+        """
+        for vertex_idx in sorted(self._temporary_vertices, reverse=True):
+            Graph.remove_vertex(self, self.vertex(vertex_idx))
+
+        self._temporary_vertices = []
+        self._temporary_splits = {}
+
     def plot(self, output_file_with_extension: Optional[str] = None):
         """
         To return a graph image
@@ -2,6 +2,7 @@ import warnings
 
 import logging
 
+from typing import Iterator
 from typing import Optional
 from typing import List
 from typing import Dict
@@ -17,38 +18,58 @@ from osmgt.helpers.global_values import min_2_sec
 from osmgt.helpers.global_values import distance_unit
 from osmgt.helpers.global_values import time_unit
 from osmgt.helpers.global_values import isochrone_display_mode
+from osmgt.helpers.global_values import isochrone_display_mode_metric
 from osmgt.helpers.global_values import water_area_query
+from osmgt.helpers.global_values import topology_way_field
+from osmgt.helpers.global_values import topology_split_field
+from osmgt.helpers.global_values import topology_direction_field
+from osmgt.helpers.global_values import topology_segment_field
+from osmgt.helpers.global_values import direction_codes
+from osmgt.helpers.global_values import backward_tag
 
 from osmgt.helpers.misc import find_list_dicts_from_key_and_value
 
 import math
 
 from operator import itemgetter
+from collections import OrderedDict
+from bisect import bisect_left
 
 import geopandas as gpd
 import pandas as pd
 
-import itertools
-from collections import Counter
-
-from graph_tool.topology import shortest_distance
+import numpy as np
 
 from shapely.wkt import loads
 from shapely.geometry import Point
 from shapely.geometry import MultiPoint
 from shapely.geometry import Polygon
 from shapely.geometry import MultiPolygon
+from shapely.geometry import mapping
+
+import shapely
+from shapely import STRtree
 
 from osmgt.geometry.geom_helpers import reprojection
-from osmgt.geometry.geom_helpers import split_multiline_to_lines
+from osmgt.geometry.geom_helpers import reproject_geometries
+from osmgt.geometry.geom_helpers import local_metric_crs
 from osmgt.geometry.geom_helpers import convert_to_polygon
+from osmgt.geometry.geom_helpers import geodesic_to_planar_positions
+from osmgt.geometry.isochrone_polygon import build_isochrone_polygon
+from osmgt.geometry.isochrone_polygon import polygon_methods
 
 from shapely.ops import unary_union
+from shapely.ops import substring
 
 from osmgt.network.gt_helper import GraphHelpers
 
+from graph_tool import Graph
+from graph_tool.topology import shortest_distance
+
 import concurrent.futures
-from collections import Counter
+import multiprocessing
+import json
+import os
 
 warnings.simplefilter(action="ignore", category=UserWarning)
 
@@ -73,28 +94,43 @@ class OsmGtIsochrone(OsmGtRoads):
         "_network_gdf",
         "_graph",
         "_build_polygon",
-        "_source_vertices",
         "_display_mode_params",
         "_speed_to_m_s",
         "_isochrones_times",
         "_water_area",
+        "_water_area_index",
         "_isochrones_built",
+        "_isochrones_distances",
+        "_vertices_band",
+        "_vertices_nearest_source",
+        "_location_points",
+        "_partial_edges",
+        "_vertices_distance",
+        "_polygon_method",
+        "_polygon_crs",
+        "_polygon_params",
+        "_network_polygon_geometries",
     )
 
     logging.getLogger("geopandas.geodataframe").setLevel(logging.CRITICAL)
 
+    _INTEGER_EDGE_IDS: bool = True
+    # to build the isochrones polygons on a local metric crs (buffers in meters)
+    _METRIC_POLYGONS: bool = True
+
     __DISTANCE_TOLERANCE: float = 1.3
     __ISOCHRONE_NAME_FIELD: str = "iso_name"
     __ISODISTANCE_NAME_FIELD: str = "iso_distance"
-    __DISSOLVE_NAME_FIELD: str = "__dissolve__"
-    __TOPO_FIELD_REGEX_CLEANER: str = r"_[0-9]+$"
-    __NETWORK_MASK: str = "topo_uuids"
+    __BAND_FIELD: str = "__band__"
     __DECIMAL_ROUNDED: int = 2
 
     __ROADS_BUFFER_EROSION_DIVISOR: int = 10
 
-    __DEFAULT_CAPSTYLE: int = 1
-    __DEFAULT_JOINSTYLE: int = 1
+    __SOURCE_NODE_FIELD: str = "source_node"
+    # water polygons by bbox, shared by all the isochrones computed (least recently used bboxes are removed)
+    __WATER_AREA_CACHE: OrderedDict = OrderedDict()
+    __WATER_AREA_CACHE_SIZE: int = 8
+    __TASKS_BY_WORKER: int = 4
 
     __DISTANCE_UNIT_FIELD: str = "distance_unit"
     __TIME_UNIT_FIELD: str = "time_unit"
@@ -104,7 +140,9 @@ class OsmGtIsochrone(OsmGtRoads):
         trip_speed: float,
         isochrones_times: Optional[List],
         distance_to_compute: Optional[List] = None,
-        build_polygon: bool = True
+        build_polygon: bool = True,
+        partial_edges: bool = False,
+        polygon_method: str = "buffer",
     ) -> None:
         super().__init__()
         self.logger.info("Isochrone processing...")
@@ -116,6 +154,14 @@ class OsmGtIsochrone(OsmGtRoads):
         self._graph: Optional[GraphHelpers] = None
 
         self._build_polygon = build_polygon
+        # to cut the edges at the isochrones limits instead of interpolating the network lines
+        self._partial_edges = partial_edges
+
+        if polygon_method not in polygon_methods:
+            raise IsochroneArgError(
+                f"'polygon_method' must be one of {', '.join(polygon_methods)}"
+            )
+        self._polygon_method = polygon_method
         self._display_mode_params = isochrone_display_mode
 
         # trip_speed in km/h
@@ -178,11 +224,145 @@ class OsmGtIsochrone(OsmGtRoads):
     def from_location_points(
         self, location_points: List[Point], mode: str
     ) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+        self.__prepare_network(location_points, mode)
+
+        # reset output else isochrone will be append
+        self._output_data = []
+
+        self.__compute_vertices_band()
+        if self._partial_edges:
+            self.__cut_network_on_bands()
+        self.__project_network()
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            # the results are consumed to raise the errors of the threads
+            list(executor.map(self._compute_isochrone, self._isochrones_times))
+        # to debug
+        # for param in self._isochrones_times:
+        #     self._compute_isochrone(param)
+
+        self.__clean_network()
+        if self._build_polygon:
+            # the merged lines are reprojected once, for all the isochrones
+            self.__project_network()
+            self.__clean_isochrones()
+
+        # TODO refactor (dependency on isochone class)
+        self._OUTPUT_EXPECTED_GEOM_TYPE = "Polygon"  # mandatory.. from OsmGtRoads class
+
+        isochrones_gdf = None
+        if self._build_polygon:
+            isochrones_gdf = self.get_gdf(verbose=False)
+
+        return isochrones_gdf, self._network_gdf
+
+    def from_location_points_by_origin(
+        self,
+        location_points: List[Point],
+        mode: str,
+        output_file: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> Optional[Iterator[Dict]]:
+        """
+        Compute the isochrones of each location point separately: the network and the graph are built once
+        for all the location points, then the origins are processed on a process pool
+
+        :param location_points: location points (origins)
+        :type location_points: list of shapely.geometry.Point
+        :param mode: the transport mode
+        :type mode: str
+        :param output_file: to write the isochrones on a GeoJSON sequence file (one feature by line) instead
+            of returning them
+        :type output_file: str, default None
+        :param workers: number of processes (default: number of cpus)
+        :type workers: int, default None
+        :return: the isochrones rows (one by origin and isochrone), ordered by origin, if output_file is None
+        :rtype: iterator of dict
+        """
+        self.__prepare_network(location_points, mode)
+        self.__project_network()
+
+        isochrones_rows = self.__compute_isochrones_by_origin(workers)
+        if output_file is None:
+            return isochrones_rows
+
+        with open(output_file, "w") as output:
+            for isochrone_row in isochrones_rows:
+                geometry = isochrone_row.pop(self._GEOMETRY_FIELD)
+                output.write(
+                    json.dumps(
+                        {
+                            "type": "Feature",
+                            "properties": isochrone_row,
+                            "geometry": mapping(geometry),
+                        }
+                    )
+                    + "\n"
+                )
+
+        return None
+
+    def __compute_isochrones_by_origin(self, workers: Optional[int]) -> Iterator[Dict]:
+        # the graph is sent to the workers as arrays (edges sorted by edge index), with the network lines
+        edges = self._graph.get_edges([self._graph.edge_index])
+        edges = edges[np.argsort(edges[:, 2])]
+        network_geometries = self._network_polygon_geometries[
+            pd.Index(self._network_gdf[self._TOPO_FIELD]).get_indexer(
+                self._graph.edge_names.a[edges[:, 2]]
+            )
+        ]
+        origins = [
+            int(self._graph.find_vertex_from_name(location_point.wkt))
+            for location_point in self._location_points
+        ]
+        worker_params = (
+            self._graph.num_vertices(),
+            self._graph.is_directed(),
+            edges[:, :2],
+            self._graph.edge_weights.a[edges[:, 2]],
+            shapely.to_wkb(network_geometries),
+            shapely.to_wkb(self._water_area),
+            sorted(self._isochrones_times, key=itemgetter(1)),
+            self._polygon_params,
+            self._polygon_method,
+            self._polygon_crs,
+        )
+
+        # spawned workers: forking a process where the numba threading layer is started hangs at exit
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_isochrones_by_origin_worker,
+            initargs=worker_params,
+        ) as executor:
+            nb_workers = workers if workers is not None else os.cpu_count()
+            chunk_size = max(1, len(origins) // (nb_workers * self.__TASKS_BY_WORKER))
+            self.logger.info(
+                f"Compute isochrones of {len(origins)} origins on {nb_workers} processes"
+            )
+            for location_point, origin_isochrones in zip(
+                self._location_points,
+                executor.map(
+                    compute_origin_isochrones, origins, chunksize=chunk_size
+                ),
+            ):
+                for iso_time, dist, polygon_wkb in origin_isochrones:
+                    yield {
+                        self.__SOURCE_NODE_FIELD: location_point.wkt,
+                        self.__ISOCHRONE_NAME_FIELD: iso_time,
+                        self.__TIME_UNIT_FIELD: time_unit,
+                        self.__ISODISTANCE_NAME_FIELD: dist,
+                        self.__DISTANCE_UNIT_FIELD: distance_unit,
+                        self._GEOMETRY_FIELD: shapely.from_wkb(polygon_wkb),
+                    }
+
+    def __prepare_network(self, location_points: List[Point], mode: str) -> None:
         self._mode = mode
 
+        # duplicated points are removed, the input order is kept
         location_points = [
             loads(node)
-            for node in set([point.wkt for point in location_points])
+            for node in dict.fromkeys(point.wkt for point in location_points)
         ]
 
         points_bbox = MultiPoint(location_points)
@@ -212,7 +392,7 @@ class OsmGtIsochrone(OsmGtRoads):
             self._location_point_reprojected_buffered_bounds,
             additional_nodes=additional_nodes_gdf,
             mode=mode,
-            interpolate_lines=True,
+            interpolate_lines=not self._partial_edges,
         )
 
         self.__get_water_area_from_osm()
@@ -222,108 +402,67 @@ class OsmGtIsochrone(OsmGtRoads):
             raise IsochroneError("None network found!")
         self._graph = self.get_graph()
 
-        self._source_vertices = []
-        for idx, location_point in enumerate(location_points):
-            self._source_vertices.append(self._graph.find_vertex_from_name(location_point.wkt))
-
-        # reset output else isochrone will be append
-        self._output_data = []
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.map(self._compute_isochrone, self._isochrones_times)
-        # to debug
-        # for param in self._isochrones_times:
-        #     self._compute_isochrone(param)
-
-        self.__clean_network()
-        if self._build_polygon:
-            self.__clean_isochrones()
-
-        # TODO refactor (dependency on isochone class)
-        self._OUTPUT_EXPECTED_GEOM_TYPE = "Polygon"  # mandatory.. from OsmGtRoads class
-
-        isochrones_gdf = None
-        if self._build_polygon:
-            isochrones_gdf = self.get_gdf(verbose=False)
+        # location points outside the network area are not on the graph
+        self._location_points = [
+            location_point
+            for location_point in location_points
+            if self._graph.vertex_exists_from_name(location_point.wkt)
+        ]
+        location_points_not_found = [
+            location_point.wkt
+            for location_point in location_points
+            if location_point not in self._location_points
+        ]
+        if len(location_points_not_found) > 0:
+            self.logger.warning(
+                f"These location points are not on the network, not proceed: "
+                f"{', '.join(location_points_not_found)}"
+            )
+        if len(self._location_points) == 0:
+            raise IsochroneError("None location point found on the network!")
 
-        return isochrones_gdf, self._network_gdf
+        if self._METRIC_POLYGONS:
+            self._polygon_crs = local_metric_crs(*points_bbox.centroid.coords[0])
+            self._polygon_params = isochrone_display_mode_metric
+        else:
+            self._polygon_crs = f"EPSG:{epsg_4326}"
+            self._polygon_params = self._display_mode_params
+
+    def __project_network(self) -> None:
+        # the network lines are reprojected once on the crs of the polygons
+        self._network_polygon_geometries = reproject_geometries(
+            self._network_gdf[self._GEOMETRY_FIELD],
+            f"EPSG:{epsg_4326}",
+            self._polygon_crs,
+        )
 
     def _compute_isochrone(self, params) -> None:
 
         iso_time, dist = params
         self.logger.info(f"Compute isochrone: {iso_time} minutes => {dist} meters")
 
-        points_found = []
-        for source in self._source_vertices:
-            _, pred = shortest_distance(
-                self._graph,
-                source=source,
-                weights=self._graph.edge_weights,
-                max_dist=dist,
-                return_reached=True,
-            )
-            points_found.extend([self._graph.vertex_names[vertex] for vertex in pred])
-
-        all_edges_found_topo_uuids_count = Counter(
-            list(
-                itertools.chain(
-                    *[self._graph.find_edges_from_vertex(pt) for pt in points_found]
-                )
-            )
-        )
-        all_edges_found_topo_uuids = set(
-            list(
-                dict(
-                    filter(
-                        lambda x: x[1] > 1, all_edges_found_topo_uuids_count.items(),
-                    )
-                ).keys()
-            )
-        )
-
-        network_mask = self._network_gdf["topo_uuid"].isin(all_edges_found_topo_uuids)
+        # isochrones are like russian dolls: the current band and the lower ones are reached
+        band = np.digitize(dist, self._isochrones_distances, right=True)
+        if self._partial_edges:
+            network_mask = self._network_gdf[self.__BAND_FIELD] <= band
+        else:
+            vertices_reached = self._vertices_band <= band
 
+            # an edge is kept if its 2 vertices are reached
+            edges_found = self._graph.edge_names.a[
+                self._graph.find_edges_from_reached_vertices(vertices_reached)
+            ]
+            network_mask = self._network_gdf[self._TOPO_FIELD].isin(edges_found)
 
         if self._build_polygon:
-            iso_polygon_computed = (
-                self._network_gdf.loc[network_mask]
-                .buffer(
-                    self._display_mode_params["path_buffered"],
-                    cap_style=self.__DEFAULT_CAPSTYLE,
-                    join_style=self.__DEFAULT_JOINSTYLE,
-                    resolution=self._display_mode_params["resolution"],
-                )
-                .unary_union
-            )
-            # we want to isolate subnetwork, so if we got a multipolygon it means that we have 2+ subnetwork
-            if iso_polygon_computed.geom_type == "Polygon":
-                iso_polygon_computed = MultiPolygon([iso_polygon_computed])
-
-            output_iso_polygon = []
-            for polyg in iso_polygon_computed.geoms:
-                iso_polygon = polyg.buffer(  # merge them now
-                    self._display_mode_params["dilatation"],
-                    cap_style=self._display_mode_params["cap_style"],
-                    join_style=self._display_mode_params["join_style"],
-                    resolution=self._display_mode_params["resolution"],
-                ).buffer(
-                    self._display_mode_params["erosion"],
-                    cap_style=self._display_mode_params["cap_style"],
-                    join_style=self._display_mode_params["join_style"],
-                    resolution=self._display_mode_params["resolution"],
-                )
-                iso_polygon = convert_to_polygon(iso_polygon)
-                output_iso_polygon.extend(iso_polygon)
-
-            iso_polygon = MultiPolygon(output_iso_polygon)
-
-            # compute exterior
-            iso_polygon = MultiPolygon(
-                [
-                    Polygon(iso_polygon_part.exterior)
-                    for iso_polygon_part in convert_to_polygon(iso_polygon)
-                ]
+            iso_polygon = build_isochrone_polygon(
+                self._network_polygon_geometries[network_mask.to_numpy()],
+                self._polygon_params,
+                self._polygon_method,
             )
+            iso_polygon = reproject_geometries(
+                [iso_polygon], self._polygon_crs, f"EPSG:{epsg_4326}"
+            )[0]
         else:
             iso_polygon = None
 
@@ -333,11 +472,99 @@ class OsmGtIsochrone(OsmGtRoads):
                 self.__TIME_UNIT_FIELD: time_unit,
                 self.__ISODISTANCE_NAME_FIELD: dist,
                 self.__DISTANCE_UNIT_FIELD: distance_unit,
-                self.__NETWORK_MASK: network_mask,
                 "geometry": iso_polygon,
             }
         )
 
+    @property
+    def vertices_nearest_source(self) -> Dict[str, Optional[Point]]:
+        """
+        Nearest location point of each graph vertex (by vertex name), None if not reached
+
+        :return: nearest location point by vertex name
+        :rtype: dict
+        """
+        return {
+            self._graph.vertex_names[vertex]: (
+                self._location_points[source_position]
+                if source_position != -1
+                else None
+            )
+            for vertex, source_position in zip(
+                self._graph.vertices(), self._vertices_nearest_source
+            )
+        }
+
+    def __compute_vertices_band(self) -> None:
+        # all the sources are searched at once, bounded by the largest distance, then the distances are
+        # bucketed on the isochrones distances: band i => isochrones_distances[i-1] < distance <= isochrones_distances[i]
+        self._isochrones_distances = sorted(dist for _, dist in self._isochrones_times)
+
+        (
+            self._vertices_distance,
+            self._vertices_nearest_source,
+        ) = self._graph.multi_source_shortest_distance(
+            [location_point.wkt for location_point in self._location_points],
+            max_dist=self._isochrones_distances[-1],
+        )
+
+        # unreached vertices are on the band len(isochrones_distances)
+        self._vertices_band = np.digitize(
+            self._vertices_distance, self._isochrones_distances, right=True
+        )
+
+    def __cut_network_on_bands(self) -> None:
+        # each line is cut where its distance from the nearest source reaches an isochrone distance
+        edges = self._graph.get_edges([self._graph.edge_index])
+        edges_values = pd.DataFrame(
+            {
+                "source_distance": self._vertices_distance[edges[:, 0]],
+                "target_distance": self._vertices_distance[edges[:, 1]],
+                "weight": self._graph.edge_weights.a[edges[:, 2]],
+            },
+            index=self._graph.edge_names.a[edges[:, 2]],
+        ).loc[self._network_gdf[self._TOPO_FIELD]]
+
+        rows_idx = []
+        geometries = []
+        bands = []
+        for row_idx, (geometry, source_distance, target_distance, weight) in enumerate(
+            zip(
+                self._network_gdf[self._GEOMETRY_FIELD],
+                edges_values["source_distance"],
+                edges_values["target_distance"],
+                edges_values["weight"],
+            )
+        ):
+            parts = cut_edge_on_bands(
+                source_distance,
+                target_distance,
+                weight,
+                self._isochrones_distances,
+                self._graph.is_directed(),
+            )
+            if len(parts) == 1:
+                rows_idx.append(row_idx)
+                geometries.append(geometry)
+                bands.append(parts[0][-1])
+                continue
+
+            # the weight is a geodesic length: the cuts are moved on the planar length used by substring
+            planar_positions = geodesic_to_planar_positions(
+                geometry, [part[0] for part in parts] + [parts[-1][1]]
+            )
+            for (_, _, band), start, end in zip(
+                parts, planar_positions[:-1], planar_positions[1:]
+            ):
+                rows_idx.append(row_idx)
+                geometries.append(substring(geometry, start, end, normalized=True))
+                bands.append(band)
+
+        network_gdf = self._network_gdf.iloc[rows_idx].reset_index(drop=True)
+        network_gdf[self._GEOMETRY_FIELD] = geometries
+        network_gdf[self.__BAND_FIELD] = bands
+        self._network_gdf = network_gdf
+
     def __clean_network(self) -> None:
         # reverse order for isochrone, because isochrone mask is like russian dolls
         self._isochrones_data = sorted(
@@ -345,36 +572,87 @@ class OsmGtIsochrone(OsmGtRoads):
             key=lambda k: k[self.__ISOCHRONE_NAME_FIELD],
             reverse=True,
         )
-        for isochrone_computed in self._isochrones_data:
-            self._network_gdf.loc[
-                isochrone_computed[self.__NETWORK_MASK], self.__ISOCHRONE_NAME_FIELD
-            ] = isochrone_computed[self.__ISOCHRONE_NAME_FIELD]
-            self._network_gdf.loc[
-                isochrone_computed[self.__NETWORK_MASK], self.__ISODISTANCE_NAME_FIELD
-            ] = isochrone_computed[self.__ISODISTANCE_NAME_FIELD]
-            del isochrone_computed[self.__NETWORK_MASK]
-
-        self._network_gdf[self._TOPO_FIELD].replace(
-            self.__TOPO_FIELD_REGEX_CLEANER, "", regex=True, inplace=True
+
+        # each line gets the band of its farthest vertex (or its own band if the lines are cut)
+        if self._partial_edges:
+            lines_band = self._network_gdf[self.__BAND_FIELD].to_numpy()
+        else:
+            edges = self._graph.get_edges([self._graph.edge_index])
+            lines_band = (
+                pd.Series(
+                    np.maximum(
+                        self._vertices_band[edges[:, 0]], self._vertices_band[edges[:, 1]]
+                    ),
+                    index=self._graph.edge_names.a[edges[:, 2]],
+                )
+                .loc[self._network_gdf[self._TOPO_FIELD]]
+                .to_numpy()
+            )
+        lines_reached = lines_band < len(self._isochrones_distances)
+        network_gdf = self._network_gdf.loc[lines_reached].drop(
+            columns=[self.__BAND_FIELD], errors="ignore"
+        )
+        lines_band = lines_band[lines_reached]
+
+        # segments are merged on their way, split, direction and band: they are ordered along their way, then
+        # consecutive segments sharing their end points are concatenated
+        directions = network_gdf[topology_direction_field].to_numpy()
+        segments_order = np.where(
+            directions == direction_codes[backward_tag], -1, 1
+        ) * network_gdf[topology_segment_field].to_numpy()
+        lines_keys = np.column_stack(
+            [
+                network_gdf[topology_way_field].to_numpy(),
+                network_gdf[topology_split_field].to_numpy(),
+                directions,
+                lines_band,
+            ]
+        )
+        lines_order = np.lexsort(
+            (np.arange(lines_band.size), segments_order, *lines_keys.T[::-1])
         )
+        network_gdf = network_gdf.iloc[lines_order]
+        lines_keys = lines_keys[lines_order]
+        lines_band = lines_band[lines_order]
 
-        self._network_gdf[self.__DISSOLVE_NAME_FIELD] = (
-            self._network_gdf[self._TOPO_FIELD].astype(str)
-            + "__"
-            + self._network_gdf[self.__ISOCHRONE_NAME_FIELD].astype(str)
+        geometries = network_gdf[self._GEOMETRY_FIELD].to_numpy()
+        coordinates, coordinates_line_index = shapely.get_coordinates(
+            geometries, return_index=True
         )
-        self._network_gdf = self._network_gdf.dissolve(
-            by=self.__DISSOLVE_NAME_FIELD
-        ).reset_index(drop=True)
+        lines_coordinates_start = np.r_[
+            0, np.cumsum(shapely.get_num_coordinates(geometries))[:-1]
+        ]
+        lines_coordinates_end = np.r_[lines_coordinates_start[1:] - 1, coordinates.shape[0] - 1]
 
-        # convert multilinestring to LineStrings
-        self._network_gdf = split_multiline_to_lines(
-            self._network_gdf, epsg_4326, self._TOPO_FIELD
+        is_new_line = np.ones(lines_band.size, dtype=bool)
+        is_new_line[1:] = np.any(lines_keys[1:] != lines_keys[:-1], axis=1) | np.any(
+            coordinates[lines_coordinates_end[:-1]]
+            != coordinates[lines_coordinates_start[1:]],
+            axis=1,
+        )
+        # the first coordinate of a continuing segment is the last one of the previous segment
+        coordinates_kept = np.ones(coordinates.shape[0], dtype=bool)
+        coordinates_kept[lines_coordinates_start[~is_new_line]] = False
+        new_lines_index = np.cumsum(is_new_line) - 1
+
+        network_gdf = network_gdf.loc[is_new_line].reset_index(drop=True)
+        network_gdf[self._GEOMETRY_FIELD] = shapely.linestrings(
+            coordinates[coordinates_kept],
+            indices=new_lines_index[coordinates_line_index][coordinates_kept],
         )
+        # the merged lines have no topology id anymore: each one gets its row position
+        network_gdf[self._TOPO_FIELD] = network_gdf.index.to_numpy()
 
-        self._network_gdf = self._network_gdf[
-            self._network_gdf[self.__ISOCHRONE_NAME_FIELD].notnull()
+        isochrones_names = [
+            iso_time for iso_time, _ in sorted(self._isochrones_times, key=itemgetter(1))
         ]
+        network_gdf[self.__ISOCHRONE_NAME_FIELD] = np.take(
+            isochrones_names, lines_band[is_new_line]
+        )
+        network_gdf[self.__ISODISTANCE_NAME_FIELD] = np.take(
+            self._isochrones_distances, lines_band[is_new_line]
+        )
+        self._network_gdf = network_gdf
 
     def __clean_isochrones(self) -> None:
         # find iso index pair in order to create hole geom. isochrones are like russian dolls
@@ -458,34 +736,36 @@ class OsmGtIsochrone(OsmGtRoads):
         isochrone_computed: Union[Polygon, MultiPolygon],
         current_main_isochrone: Dict,
     ) -> Union[Polygon, MultiPolygon]:
-        # add roads on the raw isochrone to respect isochrone area
-        iso_value_main_part_roads_buffered = (
-            self._network_gdf.loc[
+        # add roads on the raw isochrone to respect isochrone area: they are buffered on the crs of the polygons
+        roads = self._network_polygon_geometries[
+            (
                 self._network_gdf[self.__ISOCHRONE_NAME_FIELD]
                 == current_main_isochrone[self.__ISOCHRONE_NAME_FIELD]
-            ]
-            .buffer(
-                self._display_mode_params["path_buffered"],
-                resolution=self._display_mode_params["resolution"],
-                cap_style=self._display_mode_params["cap_style"],
-            )
-            .unary_union.buffer(
-                self._display_mode_params["path_buffered"]
-                / self.__ROADS_BUFFER_EROSION_DIVISOR,
-                resolution=self._display_mode_params["resolution"],
+            ).to_numpy()
+        ]
+        roads_buffered = shapely.union_all(
+            shapely.buffer(
+                roads,
+                self._polygon_params["path_buffered"],
+                quad_segs=self._polygon_params["resolution"],
+                cap_style=self._polygon_params["cap_style"],
             )
+        ).buffer(
+            self._polygon_params["path_buffered"] / self.__ROADS_BUFFER_EROSION_DIVISOR,
+            quad_segs=self._polygon_params["resolution"],
         )
+        roads_buffered = reproject_geometries(
+            [roads_buffered], self._polygon_crs, f"EPSG:{epsg_4326}"
+        )[0]
         iso_value_main_part_roads_buffered = MultiPolygon(
             [
                 iso_polygon_part
-                for iso_polygon_part in convert_to_polygon(
-                    iso_value_main_part_roads_buffered
-                )
+                for iso_polygon_part in convert_to_polygon(roads_buffered)
             ]
         )
         # remove water area
-        isochrone_computed_without_water_area = isochrone_computed.difference(
-            self._water_area
+        isochrone_computed_without_water_area = remove_water_area(
+            isochrone_computed, self._water_area, self._water_area_index
         )
 
         # finalize
@@ -496,10 +776,38 @@ class OsmGtIsochrone(OsmGtRoads):
         return isochrone_computed
 
     def __get_water_area_from_osm(self) -> None:
+        bbox_input: Tuple[float] = self._location_point_reprojected_buffered_bounds
+
+        # a cached area covering the bbox is reused
+        x_min, y_min, x_max, y_max = bbox_input
+        bbox_found = next(
+            (
+                bbox_cached
+                for bbox_cached in self.__WATER_AREA_CACHE
+                if bbox_cached[0] <= x_min
+                and bbox_cached[1] <= y_min
+                and bbox_cached[2] >= x_max
+                and bbox_cached[3] >= y_max
+            ),
+            None,
+        )
+        if bbox_found is None:
+            water_area = self.__query_water_area(bbox_input)
+            self.__WATER_AREA_CACHE[tuple(bbox_input)] = water_area
+            if len(self.__WATER_AREA_CACHE) > self.__WATER_AREA_CACHE_SIZE:
+                self.__WATER_AREA_CACHE.popitem(last=False)
+        else:
+            self.logger.info("Water data found on cache")
+            water_area = self.__WATER_AREA_CACHE[bbox_found]
+            self.__WATER_AREA_CACHE.move_to_end(bbox_found)
 
+        # water polygons are not merged: only the ones close to an isochrone are used
+        self._water_area: np.ndarray = water_area
+        self._water_area_index = STRtree(self._water_area)
+
+    def __query_water_area(self, bbox_input: Tuple[float]) -> np.ndarray:
         self.logger.info("Get water data from OSM")
         # get water area
-        bbox_input: Tuple[float] = self._location_point_reprojected_buffered_bounds
         bbox_value = (bbox_input[1], bbox_input[0], bbox_input[3], bbox_input[2])
         request: str = self._from_bbox_query_builder(bbox_value, water_area_query)
         raw_data: List[Dict] = self._query_on_overpass_api(request)
@@ -521,4 +829,218 @@ class OsmGtIsochrone(OsmGtRoads):
                             [(geom["lon"], geom["lat"]) for geom in feature["geometry"]]
                         )
                     )
-        self._water_area: Union[Polygon, MultiPolygon] = unary_union(water_area)
+
+        return np.array(water_area, dtype=object)
+
+
+def remove_water_area(
+    geometry: Union[Polygon, MultiPolygon], water_area: np.ndarray, water_area_index: STRtree
+) -> Union[Polygon, MultiPolygon]:
+    """
+    Remove the water area from a geometry: only the water polygons intersecting its envelope are used
+
+    :param geometry: the geometry
+    :type geometry: shapely.geometry.Polygon or shapely.geometry.MultiPolygon
+    :param water_area: water polygons
+    :type water_area: numpy.ndarray
+    :param water_area_index: spatial index of the water polygons
+    :type water_area_index: shapely.STRtree
+    :return: the geometry without the water area
+    :rtype: shapely.geometry.Polygon or shapely.geometry.MultiPolygon
+    """
+    water_area_found = water_area_index.query(geometry)
+    if water_area_found.size == 0:
+        return geometry
+
+    return geometry.difference(shapely.union_all(water_area[water_area_found]))
+
+
+def cut_edge_on_bands(
+    source_distance: float,
+    target_distance: float,
+    weight: float,
+    isochrones_distances: List[float],
+    is_directed: bool,
+) -> List[Tuple[float, float, int]]:
+    """
+    Cut an edge where its distance from the nearest source reaches an isochrone distance. The distance along
+    the edge grows from its source, or from its nearest end on an undirected graph
+
+    :param source_distance: distance of the edge source (inf if not reached)
+    :type source_distance: float
+    :param target_distance: distance of the edge target (inf if not reached)
+    :type target_distance: float
+    :param weight: edge weight (length)
+    :type weight: float
+    :param isochrones_distances: isochrones distances (ascending)
+    :type isochrones_distances: list of float
+    :param is_directed: is the graph directed
+    :type is_directed: bool
+    :return: the parts of the edge: start and end (normalized positions) and band (len(isochrones_distances)
+        if not reached)
+    :rtype: list of tuple (float, float, int)
+    """
+
+    def distance_at(position: float) -> float:
+        distance = source_distance + position * weight
+        if not is_directed:
+            distance = min(distance, target_distance + (1.0 - position) * weight)
+        return distance
+
+    cuts = {0.0, 1.0}
+    if weight > 0:
+        for isochrone_distance in isochrones_distances:
+            cuts.add((isochrone_distance - source_distance) / weight)
+            if not is_directed:
+                cuts.add(1.0 - (isochrone_distance - target_distance) / weight)
+    cuts = sorted(cut for cut in cuts if 0.0 <= cut <= 1.0)
+
+    parts = []
+    for start, end in zip(cuts, cuts[1:]):
+        band = bisect_left(isochrones_distances, distance_at((start + end) / 2))
+        if len(parts) > 0 and parts[-1][-1] == band:
+            parts[-1] = (parts[-1][0], end, band)
+        else:
+            parts.append((start, end, band))
+
+    return parts
+
+
+# isochrones by origin: the graph and the network lines are loaded once by worker process
+_origin_worker_data: Dict = {}
+
+
+def init_isochrones_by_origin_worker(
+    nb_vertices: int,
+    is_directed: bool,
+    edges: np.ndarray,
+    weights: np.ndarray,
+    network_geometries_wkb: np.ndarray,
+    water_area_wkb: np.ndarray,
+    isochrones_times: List[Tuple[float, float]],
+    display_mode_params: Dict,
+    polygon_method: str,
+    polygon_crs: str,
+) -> None:
+    water_area = shapely.from_wkb(water_area_wkb)
+
+    graph = Graph(directed=is_directed)
+    graph.add_vertex(nb_vertices)
+    graph.add_edge_list(edges)
+    edge_weights = graph.new_edge_property("double")
+    edge_weights.a = weights
+
+    _origin_worker_data.update(
+        graph=graph,
+        edge_weights=edge_weights,
+        edges=edges,
+        network_geometries=shapely.from_wkb(network_geometries_wkb),
+        water_area=water_area,
+        water_area_index=STRtree(water_area),
+        isochrones_times=isochrones_times,
+        isochrones_distances=[dist for _, dist in isochrones_times],
+        display_mode_params=display_mode_params,
+        polygon_method=polygon_method,
+        polygon_crs=polygon_crs,
+    )
+
+
+def compute_origin_isochrones(origin: int) -> List[Tuple[float, float, bytes]]:
+    """
+    Compute the isochrones of an origin (see init_isochrones_by_origin_worker)
+
+    :param origin: the origin vertex index
+    :type origin: int
+    :return: for each isochrone (ascending): its time, its distance and its polygon (WKB), without the
+        lower isochrones
+    :rtype: list of tuple
+    """
+    graph = _origin_worker_data["graph"]
+    edges = _origin_worker_data["edges"]
+    isochrones_distances = _origin_worker_data["isochrones_distances"]
+
+    distances = shortest_distance(
+        graph,
+        source=graph.vertex(origin),
+        weights=_origin_worker_data["edge_weights"],
+        max_dist=isochrones_distances[-1],
+    ).a
+    isochrones = build_isochrones_from_distances(
+        distances,
+        edges,
+        _origin_worker_data["network_geometries"],
+        isochrones_distances,
+        _origin_worker_data["display_mode_params"],
+        _origin_worker_data["polygon_method"],
+        _origin_worker_data["polygon_crs"],
+        _origin_worker_data["water_area"],
+        _origin_worker_data["water_area_index"],
+    )
+
+    return [
+        (iso_time, dist, shapely.to_wkb(isochrone))
+        for (iso_time, dist), isochrone in zip(
+            _origin_worker_data["isochrones_times"], isochrones
+        )
+    ]
+
+
+def build_isochrones_from_distances(
+    vertices_distance: np.ndarray,
+    edges: np.ndarray,
+    network_geometries: np.ndarray,
+    isochrones_distances: List[float],
+    display_mode_params: Dict,
+    polygon_method: str,
+    polygon_crs: str,
+    water_area: Optional[np.ndarray] = None,
+    water_area_index: Optional[STRtree] = None,
+) -> List[Union[Polygon, MultiPolygon]]:
+    """
+    Build the isochrones polygons from the distances of the vertices: an edge is on the band of its farthest
+    vertex
+
+    :param vertices_distance: distance of each vertex (by vertex index), inf if not reached
+    :type vertices_distance: numpy.ndarray
+    :param edges: source and target vertex indexes of each edge
+    :type edges: numpy.ndarray
+    :param network_geometries: line of each edge (on polygon_crs)
+    :type network_geometries: numpy.ndarray
+    :param isochrones_distances: isochrones distances (ascending)
+    :type isochrones_distances: list of float
+    :param display_mode_params: polygon parameters (on polygon_crs units)
+    :type display_mode_params: dict
+    :param polygon_method: see build_isochrone_polygon
+    :type polygon_method: str
+    :param polygon_crs: crs of the network lines
+    :type polygon_crs: str
+    :param water_area: water polygons to remove (EPSG:4326)
+    :type water_area: numpy.ndarray, default None
+    :param water_area_index: water polygons index
+    :type water_area_index: shapely.STRtree, default None
+    :return: the isochrones (EPSG:4326, ascending), each one without the lower isochrones
+    :rtype: list of shapely.geometry.Polygon or shapely.geometry.MultiPolygon
+    """
+    vertices_band = np.digitize(vertices_distance, isochrones_distances, right=True)
+    edges_band = np.maximum(vertices_band[edges[:, 0]], vertices_band[edges[:, 1]])
+
+    isochrones = []
+    lower_isochrone_polygon = None
+    for band in range(len(isochrones_distances)):
+        iso_polygon = build_isochrone_polygon(
+            network_geometries[edges_band <= band], display_mode_params, polygon_method
+        )
+        iso_polygon = reproject_geometries(
+            [iso_polygon], polygon_crs, f"EPSG:{epsg_4326}"
+        )[0]
+        if water_area is not None:
+            iso_polygon = remove_water_area(iso_polygon, water_area, water_area_index)
+
+        isochrone = iso_polygon
+        if lower_isochrone_polygon is not None:
+            isochrone = iso_polygon.difference(lower_isochrone_polygon)
+        lower_isochrone_polygon = iso_polygon
+
+        isochrones.append(isochrone)
+
+    return isochrones
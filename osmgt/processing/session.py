@@ -0,0 +1,403 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from osmgt.compoments.roads import OsmGtRoads
+from osmgt.compoments.core import EmptyData
+
+from osmgt.helpers.global_values import epsg_4326
+from osmgt.helpers.global_values import distance_unit
+from osmgt.helpers.global_values import isochrone_display_mode_metric
+
+import geopandas as gpd
+import pandas as pd
+
+import numpy as np
+
+import shapely
+from shapely import STRtree
+from shapely.geometry import Point
+from shapely.geometry import box
+from shapely.ops import substring
+
+from graph_tool.topology import shortest_path
+from graph_tool.topology import shortest_distance
+
+from osmgt.geometry.geom_helpers import compute_wg84_lines_length
+from osmgt.geometry.geom_helpers import concatenate_lines
+from osmgt.geometry.geom_helpers import local_metric_crs
+from osmgt.geometry.geom_helpers import reproject_geometries
+
+from osmgt.geometry.isochrone_polygon import polygon_methods
+
+from osmgt.network.gt_helper import GraphHelpers
+
+from osmgt.processing.isochrone import build_isochrones_from_distances
+
+
+class NetworkSessionError(Exception):
+    pass
+
+
+class NetworkSession(OsmGtRoads):
+    """Network loaded once (from a location or a bbox), then used to answer many queries:
+
+    - shortest_path()
+    - isochrones()
+
+    each query only snaps its points on the graph and runs its searches: points are snapped on their nearest
+    edge with temporary vertices (see GraphHelpers.add_temporary_vertex()), or on their nearest vertex
+    """
+
+    __slots__ = (
+        "_graph",
+        "_network_gdf",
+        "_edges",
+        "_edges_rows",
+        "_edges_index",
+        "_edges_geometries",
+        "_polygon_crs",
+        "_network_polygon_geometries",
+    )
+
+    _INTEGER_EDGE_IDS: bool = True
+    _SNAP_ON_EDGES: bool = True
+
+    __SOURCE_NODE_FIELD: str = "source_node"
+    __TARGET_NODE_FIELD: str = "target_node"
+    __LENGTH_FIELD: str = "length"
+    __ISODISTANCE_NAME_FIELD: str = "iso_distance"
+    __DISTANCE_UNIT_FIELD: str = "distance_unit"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.logger.info("Network session...")
+
+        self._graph: Optional[GraphHelpers] = None
+        self._network_gdf: Optional[gpd.GeoDataFrame] = None
+
+    def from_location(
+        self,
+        location_name: str,
+        mode: str,
+        interpolate_lines: bool = False,
+        keep_largest_components: Optional[int] = 1,
+    ) -> "NetworkSession":
+        """
+        Load the network of a location
+
+        :param location_name: the name of the location
+        :type location_name: str
+        :param mode: the transport mode
+        :type mode: str, one of : pedestrian, vehicle
+        :param interpolate_lines: to densify the lines
+        :type interpolate_lines: bool, default False
+        :param keep_largest_components: to only keep the N largest connected components
+        :type keep_largest_components: int, default 1
+        :return: the session
+        :rtype: NetworkSession
+        """
+        super().from_location(location_name, None, mode, interpolate_lines)
+        self.__build_session(keep_largest_components)
+
+        return self
+
+    def from_bbox(
+        self,
+        bbox_value: Tuple[float, float, float, float],
+        mode: str,
+        interpolate_lines: bool = False,
+        keep_largest_components: Optional[int] = 1,
+    ) -> "NetworkSession":
+        """
+        Load the network of a bbox
+
+        :param bbox_value: the bbox (min lat, min lon, max lat, max lon)
+        :type bbox_value: tuple of float
+        :param mode: the transport mode
+        :type mode: str, one of : pedestrian, vehicle
+        :param interpolate_lines: to densify the lines
+        :type interpolate_lines: bool, default False
+        :param keep_largest_components: to only keep the N largest connected components
+        :type keep_largest_components: int, default 1
+        :return: the session
+        :rtype: NetworkSession
+        """
+        super().from_bbox(bbox_value, None, mode, interpolate_lines)
+        self.__build_session(keep_largest_components)
+
+        return self
+
+    def __build_session(self, keep_largest_components: Optional[int]) -> None:
+        self._network_gdf = self.get_gdf()
+        self._graph = self.get_graph(keep_largest_components)
+
+        # edges (sorted by edge index) and their network rows
+        edges = self._graph.get_edges([self._graph.edge_index])
+        self._edges = edges[np.argsort(edges[:, 2])]
+        self._edges_rows = np.full(self._graph.edge_index_range, -1, dtype=np.int64)
+        self._edges_rows[self._edges[:, 2]] = pd.Index(
+            self._network_gdf[self._TOPO_FIELD]
+        ).get_indexer(self._graph.edge_names.a[self._edges[:, 2]])
+
+        # edges geometries (sorted by edge index) are indexed to snap the points on the edges
+        self._edges_geometries = self._network_gdf[self._GEOMETRY_FIELD].to_numpy()[
+            self._edges_rows[self._edges[:, 2]]
+        ]
+        self._edges_index = STRtree(self._edges_geometries)
+
+        # the lines are projected once for the isochrones polygons
+        network_bounds = self._network_gdf.total_bounds
+        self._polygon_crs = local_metric_crs(
+            *box(*network_bounds).centroid.coords[0]
+        )
+        self._network_polygon_geometries = reproject_geometries(
+            self._edges_geometries, f"EPSG:{epsg_4326}", self._polygon_crs,
+        )
+        self.logger.info("Network session ready")
+
+    def _check_session(self) -> None:
+        if self._graph is None:
+            raise NetworkSessionError("Load a network first (from_location or from_bbox)")
+
+    def snap_points(self, points: List[Point]) -> np.ndarray:
+        """
+        Find the nearest graph vertex of each point
+
+        :param points: points
+        :type points: list of shapely.geometry.Point
+        :return: vertex indexes
+        :rtype: numpy.ndarray
+        """
+        self._check_session()
+        return self._graph.nearest_vertices(points)
+
+    def __locate_points_on_edges(
+        self, points: List[Point]
+    ) -> Tuple[List[List[Tuple[int, float]]], np.ndarray, np.ndarray]:
+        # nearest edges of each point: all of them if equidistant (ex: forward and backward edges of a road)
+        points = np.asarray(points, dtype=object)
+        points_position, edges_position = self._edges_index.query_nearest(
+            points, all_matches=True
+        )
+        edges_line = self._edges_geometries[edges_position]
+        edges_fraction = shapely.line_locate_point(
+            edges_line, points[points_position], normalized=True
+        )
+        connectors_weight = compute_wg84_lines_length(
+            shapely.shortest_line(points[points_position], edges_line)
+        )
+        edges_name = self._graph.edge_names.a[self._edges[edges_position, 2]]
+
+        points_edges: List[List[Tuple[int, float]]] = [[] for _ in range(points.size)]
+        for point_position, edge_name, edge_fraction in zip(
+            points_position, edges_name, edges_fraction
+        ):
+            points_edges[point_position].append((int(edge_name), float(edge_fraction)))
+
+        # the component of a point is the one of its edges
+        _, first_matches = np.unique(points_position, return_index=True)
+        points_component = self._graph.component_labels[
+            self._edges[edges_position[first_matches], 0]
+        ]
+
+        return points_edges, connectors_weight[first_matches], points_component
+
+    def shortest_path(self, source_target_points: List[Tuple[Point, Point]]) -> gpd.GeoDataFrame:
+        """
+        Compute the shortest paths between pairs of points
+
+        :param source_target_points: list of tuple source and target points
+        :type source_target_points: list of tuple (shapely.geometry.Point)
+        :return: GeoDataframe containing all the shortest paths
+        :rtype: geopandas.GeoDataFrame
+        """
+        self._check_session()
+        sources = [source for source, _ in source_target_points]
+        targets = [target for _, target in source_target_points]
+
+        if self._SNAP_ON_EDGES:
+            sources_edges, sources_weight, sources_component = self.__locate_points_on_edges(sources)
+            targets_edges, targets_weight, targets_component = self.__locate_points_on_edges(targets)
+            find_path = self.__compute_shortest_path_on_edges
+            pairs_args = zip(
+                zip(sources_edges, sources_weight),
+                zip(targets_edges, targets_weight),
+                sources_component == targets_component,
+            )
+        else:
+            component_labels = self._graph.component_labels
+            sources_vertex = self.snap_points(sources)
+            targets_vertex = self.snap_points(targets)
+            find_path = self.__compute_shortest_path
+            pairs_args = zip(
+                sources_vertex.tolist(),
+                targets_vertex.tolist(),
+                component_labels[sources_vertex] == component_labels[targets_vertex],
+            )
+
+        output_data: List[Dict] = []
+        for (source_node, target_node), (source, target, same_component) in zip(
+            source_target_points, pairs_args
+        ):
+            path = find_path(source, target) if same_component else None
+            if path is None:
+                self.logger.info(
+                    f"Path from {source_node.wkt} to {target_node.wkt} not found: not proceed!"
+                )
+                continue
+
+            output_data.append(
+                {
+                    self.__SOURCE_NODE_FIELD: source_node.wkt,
+                    self.__TARGET_NODE_FIELD: target_node.wkt,
+                    **path,
+                }
+            )
+
+        return self.__to_gdf(output_data)
+
+    def __compute_shortest_path_on_edges(
+        self, source: Tuple[List[Tuple[int, float]], float], target: Tuple[List[Tuple[int, float]], float]
+    ) -> Optional[Dict]:
+        # the points are added on the graph for the search only
+        source_vertex, source_edges = self._graph.add_temporary_vertex(*source)
+        target_vertex, target_edges = self._graph.add_temporary_vertex(*target)
+        try:
+            return self.__compute_shortest_path(
+                source_vertex, target_vertex, {**source_edges, **target_edges}
+            )
+        finally:
+            self._graph.remove_temporary_vertices()
+
+    def __compute_shortest_path(
+        self,
+        source_vertex: int,
+        target_vertex: int,
+        temporary_edges: Optional[Dict[int, Tuple[int, float, float]]] = None,
+    ) -> Optional[Dict]:
+        if source_vertex == target_vertex:
+            return None
+
+        path_vertices, path_edges = shortest_path(
+            self._graph,
+            source=self._graph.vertex(source_vertex),
+            target=self._graph.vertex(target_vertex),
+            weights=self._graph.edge_weights,
+        )
+        if len(path_edges) == 0:
+            # directed graph: the target is on the same component but can't be reached
+            return None
+
+        # each path edge is an edge part: (edge index, start fraction, end fraction), the connectors are skipped
+        temporary_edges = temporary_edges if temporary_edges is not None else {}
+        edges_part, edges_reversed, edges_weight = [], [], []
+        for path_vertex, edge in zip(path_vertices, path_edges):
+            edge_idx = int(self._graph.edge_index[edge])
+            edge_part = temporary_edges.get(edge_idx, (edge_idx, 0.0, 1.0))
+            if edge_part[0] == -1 or edge_part[1] == edge_part[2]:
+                continue
+            edges_part.append(edge_part)
+            # an edge is reversed if the path goes from its target to its source
+            edges_reversed.append(int(edge.source()) != int(path_vertex))
+            edges_weight.append(self._graph.edge_weights[edge])
+
+        if len(edges_part) == 0:
+            return None
+
+        edges_idx = np.array([edge_idx for edge_idx, *_ in edges_part], dtype=np.int64)
+        path_rows = self._network_gdf.iloc[self._edges_rows[edges_idx]]
+        path_lines = [
+            line if (start, end) == (0.0, 1.0) else substring(line, start, end, normalized=True)
+            for line, (_, start, end) in zip(path_rows[self._GEOMETRY_FIELD].to_numpy(), edges_part)
+        ]
+
+        return {
+            "osm_ids": ", ".join(
+                path_rows[self._ID_OSM_FIELD].dropna().astype(str).unique()
+            ),
+            "osm_urls": ", ".join(
+                path_rows[self._OSM_URL_FIELD].dropna().astype(str).unique()
+            ),
+            self.__LENGTH_FIELD: float(sum(edges_weight)),
+            self._GEOMETRY_FIELD: concatenate_lines(path_lines, edges_reversed),
+        }
+
+    def isochrones(
+        self,
+        points: List[Point],
+        distances: List[float],
+        polygon_method: str = "buffer",
+    ) -> gpd.GeoDataFrame:
+        """
+        Compute the isochrones of each point
+
+        :param points: location points
+        :type points: list of shapely.geometry.Point
+        :param distances: isochrones distances (meters)
+        :type distances: list of float
+        :param polygon_method: see build_isochrone_polygon
+        :type polygon_method: str, default "buffer"
+        :return: GeoDataframe containing the isochrones, by point and distance (without the lower ones)
+        :rtype: geopandas.GeoDataFrame
+        :raises ValueError: if polygon_method is unknown
+        """
+        if polygon_method not in polygon_methods:
+            raise ValueError(
+                f"'polygon_method' must be one of {', '.join(polygon_methods)}"
+            )
+        self._check_session()
+        distances = sorted(distances)
+        if self._SNAP_ON_EDGES:
+            points_edges, points_weight, _ = self.__locate_points_on_edges(points)
+        else:
+            points_vertex = self.snap_points(points)
+
+        output_data: List[Dict] = []
+        for point_position, point in enumerate(points):
+            if self._SNAP_ON_EDGES:
+                point_vertex, _ = self._graph.add_temporary_vertex(
+                    points_edges[point_position], points_weight[point_position]
+                )
+            else:
+                point_vertex = int(points_vertex[point_position])
+            try:
+                # the edges partially reached from a temporary vertex are not kept
+                vertices_distance = shortest_distance(
+                    self._graph,
+                    source=self._graph.vertex(point_vertex),
+                    weights=self._graph.edge_weights,
+                    max_dist=distances[-1],
+                ).a.copy()
+            finally:
+                self._graph.remove_temporary_vertices()
+
+            isochrones = build_isochrones_from_distances(
+                vertices_distance,
+                self._edges,
+                self._network_polygon_geometries,
+                distances,
+                isochrone_display_mode_metric,
+                polygon_method,
+                self._polygon_crs,
+            )
+            output_data.extend(
+                {
+                    self.__SOURCE_NODE_FIELD: point.wkt,
+                    self.__ISODISTANCE_NAME_FIELD: distance,
+                    self.__DISTANCE_UNIT_FIELD: distance_unit,
+                    self._GEOMETRY_FIELD: isochrone,
+                }
+                for distance, isochrone in zip(distances, isochrones)
+            )
+
+        return self.__to_gdf(output_data)
+
+    def __to_gdf(self, output_data: List[Dict]) -> gpd.GeoDataFrame:
+        if len(output_data) == 0:
+            raise EmptyData("No result found")
+
+        return gpd.GeoDataFrame(
+            output_data, geometry=self._GEOMETRY_FIELD, crs=int(epsg_4326)
+        )
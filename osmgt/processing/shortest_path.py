@@ -1,4 +1,5 @@
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 from osmgt.compoments.roads import OsmGtRoads
@@ -8,13 +9,17 @@ from itertools import chain
 import geopandas as gpd
 import pandas as pd
 
+import numpy as np
+
+import shapely
+
 from graph_tool.topology import shortest_path
 
 from shapely.geometry import Point
-from shapely.geometry import LineString
-from shapely.ops import linemerge
 from shapely.wkt import loads
 
+from osmgt.geometry.geom_helpers import concatenate_lines
+
 import concurrent.futures
 
 
@@ -23,10 +28,16 @@ class OsmGtShortestPath(OsmGtRoads):
         "_source_target_points",
         "_all_points",
         "_graph",
+        "_contracted_edges",
         "_gdf",
+        "_edges_rows",
+        "_lines_start",
+        "_lines_end",
         "_additional_nodes_gdf",
         "_output_data"
     )
+    _INTEGER_EDGE_IDS: bool = True
+    _CONTRACT_GRAPH: bool = True
 
     def __init__(self, source_target_points: List[Tuple[Point, Point]]) -> None:
         super().__init__()
@@ -36,7 +47,9 @@ class OsmGtShortestPath(OsmGtRoads):
         self._all_points = chain(*self._source_target_points)
 
         self._graph = None
+        self._contracted_edges = None
         self._gdf = None
+        self._edges_rows: Optional[List[np.ndarray]] = None
         self._additional_nodes_gdf = self._prepare_addtionnal_nodes()
 
     @staticmethod
@@ -94,21 +107,59 @@ class OsmGtShortestPath(OsmGtRoads):
 
     def _compute_data_and_graph(self) -> gpd.GeoDataFrame:
         self._graph = super().get_graph()
+        if self._CONTRACT_GRAPH:
+            # sources and targets must stay vertices of the routing graph
+            self._graph, self._contracted_edges = self._graph.contract_degree_2_vertices(
+                {
+                    point.wkt
+                    for point in chain.from_iterable(self._source_target_points)
+                }
+            )
         self._gdf = self.get_gdf()
+        self.__index_edges_rows()
 
         self._output_data = []
 
         with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.map(self._compute_shortest_path, self._source_target_points)
+            # consumed to raise the workers exceptions
+            list(executor.map(self._compute_shortest_path, self._source_target_points))
 
         return self.get_gdf()
 
+    def __index_edges_rows(self) -> None:
+        # network rows of each routing edge (by edge index, from the edge source to the edge target if
+        # contracted): a path is a numpy take on the network columns
+        edges_idx = self._graph.get_edges([self._graph.edge_index])[:, 2]
+        edges_name = self._graph.edge_names.a[edges_idx].tolist()
+        if self._contracted_edges is not None:
+            edges_chain = [self._contracted_edges[edge_name] for edge_name in edges_name]
+        else:
+            edges_chain = [[edge_name] for edge_name in edges_name]
+
+        rows = pd.Index(self._gdf[self._TOPO_FIELD]).get_indexer(
+            list(chain.from_iterable(edges_chain))
+        )
+        chains_rows = np.split(rows, np.cumsum([len(chain_) for chain_ in edges_chain])[:-1])
+        self._edges_rows = [None] * self._graph.edge_index_range
+        for edge_idx, chain_rows in zip(edges_idx.tolist(), chains_rows):
+            self._edges_rows[edge_idx] = chain_rows
+
+        # lines ends, to orient the lines of a path
+        lines = self._gdf[self._GEOMETRY_FIELD].to_numpy()
+        self._lines_start = shapely.get_coordinates(shapely.get_point(lines, 0))
+        self._lines_end = shapely.get_coordinates(shapely.get_point(lines, -1))
+
     def _compute_shortest_path(self, nodes: Tuple[Point, Point]) -> None:
         source_node, target_node = nodes
         source_node_wkt = source_node.wkt
         target_node_wkt = target_node.wkt
 
-        if source_node_wkt != target_node_wkt:
+        if not self._graph.same_component(source_node_wkt, target_node_wkt):
+            self.logger.info(
+                f"Path from {source_node_wkt} to {target_node_wkt} does not exist (disconnected): not proceed!"
+            )
+
+        elif source_node_wkt != target_node_wkt:
             source_vertex = self._graph.find_vertex_from_name(source_node_wkt)
             target_vertex = self._graph.find_vertex_from_name(target_node_wkt)
 
@@ -117,36 +168,55 @@ class OsmGtShortestPath(OsmGtRoads):
             )
 
             # shortest path computing...
-            _, path_edges = shortest_path(
+            path_vertices, path_edges = shortest_path(
                 self._graph,
                 source=source_vertex,
                 target=target_vertex,
                 weights=self._graph.edge_weights,  # weights is based on line length
             )
 
-            gdf_copy = self._gdf.copy(deep=True)
-            # # get path by using edge names
-            osm_roads_features = gdf_copy[
-                gdf_copy[self._TOPO_FIELD].isin(
-                    [self._graph.edge_names[edge] for edge in path_edges]
+            if len(path_edges) == 0:
+                self.logger.info(
+                    f"Path from {source_node_wkt} to {target_node_wkt} not found: not proceed!"
                 )
-            ]
-
-            path_geoms = osm_roads_features[self._GEOMETRY_FIELD].to_list()
+                return
+
+            # the rows of an edge traversed from its target to its source are reversed
+            path_rows = np.concatenate(
+                [
+                    self._edges_rows[self._graph.edge_index[edge]][
+                        :: -1 if int(edge.source()) != int(path_vertex) else 1
+                    ]
+                    for path_vertex, edge in zip(path_vertices, path_edges)
+                ]
+            )
+            path_geoms = self._gdf[self._GEOMETRY_FIELD].to_numpy()[path_rows]
             path_osm_ids = filter(
                 lambda x: isinstance(x, str),
-                osm_roads_features[self._ID_OSM_FIELD].to_list(),
+                self._gdf[self._ID_OSM_FIELD].to_numpy()[path_rows],
             )
             path_osm_urls = filter(
                 lambda x: isinstance(x, str),
-                osm_roads_features[self._OSM_URL_FIELD].to_list(),
+                self._gdf[self._OSM_URL_FIELD].to_numpy()[path_rows],
+            )
+
+            # orient the lines from the source: a line is reversed if it does not start where the path is
+            lines_start = self._lines_start[path_rows]
+            lines_end = self._lines_end[path_rows]
+            source_coords = np.asarray(source_node.coords[0][:2])
+            path_end = (
+                lines_start[0]
+                if np.sum((lines_start[0] - source_coords) ** 2)
+                <= np.sum((lines_end[0] - source_coords) ** 2)
+                else lines_end[0]
             )
+            path_lines_reversed = []
+            for line_start, line_end in zip(lines_start, lines_end):
+                is_reversed = not np.array_equal(line_start, path_end)
+                path_lines_reversed.append(is_reversed)
+                path_end = line_start if is_reversed else line_end
 
-            # reorder linestring
-            path_found = linemerge(path_geoms)
-            if not Point(path_found.coords[0]).wkt == source_node_wkt:
-                # we have to revert the coord order of the 1+ elements
-                path_found = LineString(path_found.coords[::-1])
+            path_found = concatenate_lines(path_geoms, path_lines_reversed)
 
             self._output_data.append(
                 {
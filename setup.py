@@ -13,7 +13,8 @@ requirements = [
     "more-itertools >=8.10.0",
     "numba >=0.53.1",
     "requests-futures >=1.0.0",
-    "pygeos >=0.10.2"
+    "pygeos >=0.10.2",
+    "shapely >=2.0.0"
 ]
 
 setup_requirements = []
@@ -1,4 +1,20 @@
+import pytest
+
+from copy import deepcopy
+
+from shapely.geometry import LineString
+from shapely.geometry import MultiLineString
+from shapely.geometry import Point
+
 from osmgt.geometry.network_topology import NetworkTopology
+from osmgt.geometry.isochrone_polygon import build_isochrone_polygon
+from osmgt.geometry.geom_helpers import compute_wg84_line_length
+from osmgt.geometry.geom_helpers import concatenate_lines
+from osmgt.geometry.geom_helpers import compute_wg84_lines_length
+from osmgt.geometry.geom_helpers import local_metric_crs
+from osmgt.geometry.geom_helpers import reproject_geometries
+
+from osmgt.helpers.global_values import isochrone_display_mode
 
 from osmgt.compoments.core import OsmGtCore
 
@@ -82,3 +98,270 @@ def test_connect_lines_interpolate_lines(some_line_features, some_point_features
 
         if feature["topology"] == "added":
             assert "added_" in feature["uuid"]
+
+
+def test_connect_lines_exact_node_projection(some_line_features, some_point_features):
+    lines = [feature["geometry"] for feature in some_line_features]
+
+    raw_data_topology_rebuild = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "pedestrian",
+        exact_node_projection=True,
+    ).run()
+
+    all_uuid = [feature["uuid"] for feature in raw_data_topology_rebuild]
+    assert len(all_uuid) == len(set(all_uuid))
+    assert {"added_1", "added_2", "added_3", "added_6", "added_7", "added_8", "added_9"}.issubset(all_uuid)
+
+    for feature in raw_data_topology_rebuild:
+        if feature["topology"] == "added":
+            # the connection is the shortest segment between the node and the network
+            node = Point(feature["geometry"].coords[0])
+            assert feature["geometry"].length == pytest.approx(
+                min(node.distance(line) for line in lines), abs=1e-12
+            )
+
+
+def test_connect_lines_on_tiles(some_line_features, some_point_features):
+    serial_output = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "vehicle",
+        True,
+    ).run()
+    tiles_output = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "vehicle",
+        True,
+        workers=2,
+    ).run()
+
+    assert [(feature["uuid"], feature["geometry"].wkt) for feature in tiles_output] == [
+        (feature["uuid"], feature["geometry"].wkt) for feature in serial_output
+    ]
+
+
+def test_connect_lines_shared_attributes(some_line_features, some_point_features):
+    network_topology = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "vehicle",
+        True,
+        shared_attributes=True,
+    )
+    raw_data_topology_rebuild = network_topology.run()
+    default_raw_data_topology_rebuild = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "vehicle",
+        True,
+    ).run()
+
+    # 3 ways and 9 node connections
+    assert len(network_topology.attributes_table) == 12
+    assert len(raw_data_topology_rebuild) == len(default_raw_data_topology_rebuild)
+    for feature, default_feature in zip(
+        raw_data_topology_rebuild, default_raw_data_topology_rebuild
+    ):
+        assert set(feature.keys()) == {"uuid", "topology", "geometry", "attributes_idx"}
+        attributes = network_topology.attributes_table[feature["attributes_idx"]]
+        assert {**attributes, **feature} == {**default_feature, "attributes_idx": feature["attributes_idx"]}
+
+
+def test_connect_lines_integer_edge_ids(some_line_features, some_point_features):
+    raw_data_topology_rebuild = NetworkTopology(
+        OsmGtCore().logger,
+        some_line_features,
+        some_point_features,
+        "uuid",
+        "id",
+        "vehicle",
+        True,
+        integer_edge_ids=True,
+    ).run()
+
+    assert [feature["uuid"] for feature in raw_data_topology_rebuild] == list(
+        range(len(raw_data_topology_rebuild))
+    )
+    for feature in raw_data_topology_rebuild:
+        if feature["topology"] == "split":
+            assert feature["topo_split"] >= 0
+        else:
+            assert feature["topo_split"] == -1
+        assert feature["topo_segment"] >= 0
+        assert feature["topo_direction"] in {1, 2}
+
+    # the way 12 is a oneway, all its segments are forward
+    way_12_directions = {
+        feature["topo_direction"]
+        for feature in raw_data_topology_rebuild
+        if feature["id"] == "12"
+    }
+    assert way_12_directions == {1}
+
+
+def test_connect_lines_columnar_output(some_line_features, some_point_features):
+    def run(columnar_output):
+        return NetworkTopology(
+            OsmGtCore().logger,
+            some_line_features,
+            some_point_features,
+            "uuid",
+            "id",
+            "vehicle",
+            True,
+            shared_attributes=True,
+            columnar_output=columnar_output,
+        ).run()
+
+    output_columns = run(True)
+    raw_data_topology_rebuild = run(False)
+
+    assert set(output_columns.keys()) == {"uuid", "topology", "geometry", "attributes_idx"}
+    for column_name, column in output_columns.items():
+        assert len(column) == len(raw_data_topology_rebuild)
+        assert column.tolist() == [
+            feature[column_name] for feature in raw_data_topology_rebuild
+        ]
+
+
+def test_connect_lines_snapping_tolerance():
+    # the way 2 starts 1e-9 away from the middle of the way 1: they are connected only when snapped
+    line_features = [
+        {
+            "uuid": "1",
+            "id": "1",
+            "geometry": LineString([(0.0, 0.0), (1.0, 0.0), (2.0, 0.0)]),
+            "highway": "residential",
+        },
+        {
+            "uuid": "2",
+            "id": "2",
+            "geometry": LineString([(1.0, 1e-9), (1.0, 1.0)]),
+            "highway": "residential",
+        },
+        # the way 3 collapses on a single vertex when snapped
+        {
+            "uuid": "3",
+            "id": "3",
+            "geometry": LineString([(5.0, 5.0), (5.0, 5.0 + 1e-9)]),
+            "highway": "residential",
+        },
+    ]
+
+    def run(snapping_tolerance):
+        return NetworkTopology(
+            OsmGtCore().logger,
+            deepcopy(line_features),
+            None,
+            "uuid",
+            "id",
+            "pedestrian",
+            snapping_tolerance=snapping_tolerance,
+        ).run()
+
+    assert sorted(feature["uuid"] for feature in run(None)) == ["1", "2", "3"]
+
+    raw_data_topology_rebuild = run(1e-7)
+    assert sorted(feature["uuid"] for feature in raw_data_topology_rebuild) == [
+        "1_0",
+        "1_1",
+        "2",
+    ]
+    way_2 = next(
+        feature for feature in raw_data_topology_rebuild if feature["uuid"] == "2"
+    )
+    assert way_2["geometry"].coords[0] == (1.0, 0.0)
+
+
+@pytest.mark.parametrize(
+    "method, nb_parts_expected",
+    [
+        # each road (subnetwork) is dilated on its own: disjoint roads are not merged
+        ("buffer", 2),
+        # the closing of the grid and the hull merge the close roads
+        ("raster", 1),
+        ("concave_hull", 1),
+    ],
+)
+def test_build_isochrone_polygon(method, nb_parts_expected):
+    lines = [
+        LineString([(4.0, 46.0), (4.002, 46.0)]),
+        LineString([(4.0, 46.0005), (4.002, 46.0005), (4.002, 46.001)]),
+    ]
+    iso_polygon = build_isochrone_polygon(lines, isochrone_display_mode, method)
+
+    assert iso_polygon.geom_type == "MultiPolygon"
+    assert iso_polygon.is_valid
+    assert len(iso_polygon.geoms) == nb_parts_expected
+    assert all(len(polygon.interiors) == 0 for polygon in iso_polygon.geoms)
+    for line in lines:
+        for coordinates in line.coords:
+            assert (
+                iso_polygon.distance(Point(coordinates))
+                <= isochrone_display_mode["raster_cell_size"]
+            )
+
+
+def test_build_isochrone_polygon_without_lines():
+    assert build_isochrone_polygon([], isochrone_display_mode, "raster").is_empty
+
+
+def test_build_isochrone_polygon_unknown_method():
+    with pytest.raises(ValueError):
+        build_isochrone_polygon([], isochrone_display_mode, "unknown")
+
+
+def test_reproject_geometries_on_local_metric_crs():
+    metric_crs = local_metric_crs(4.0, 46.0)
+    center, north = reproject_geometries(
+        [Point(4.0, 46.0), Point(4.0, 46.001)], "EPSG:4326", metric_crs
+    )
+    assert center.distance(Point(0, 0)) < 1e-6
+    assert north.y == pytest.approx(111.15, abs=0.5)
+
+    north_wgs84 = reproject_geometries([north], metric_crs, "EPSG:4326")[0]
+    assert north_wgs84.x == pytest.approx(4.0)
+    assert north_wgs84.y == pytest.approx(46.001)
+
+
+def test_compute_wg84_lines_length():
+    lines = [
+        LineString([(4.0, 46.0), (4.001, 46.0), (4.001, 46.002)]),
+        MultiLineString(
+            [[(4.0, 46.0), (4.0, 46.001)], [(5.0, 46.0), (5.0, 46.001)]]
+        ),
+    ]
+    lines_length = compute_wg84_lines_length(lines)
+
+    assert lines_length.tolist() == pytest.approx(
+        [compute_wg84_line_length(line) for line in lines]
+    )
+
+
+def test_concatenate_lines():
+    lines = [
+        LineString([(0, 0), (1, 0)]),
+        LineString([(2, 0), (1, 0)]),
+        LineString([(2, 0), (2, 1), (3, 1)]),
+    ]
+    path = concatenate_lines(lines, [False, True, False])
+
+    assert list(path.coords) == [(0, 0), (1, 0), (2, 0), (2, 1), (3, 1)]
@@ -1,5 +1,11 @@
 import pytest
 
+import numpy as np
+
+from graph_tool.topology import shortest_distance
+
+from shapely.geometry import Point
+
 from osmgt.helpers.logger import Logger
 
 from osmgt.network.gt_helper import GraphHelpers
@@ -98,3 +104,174 @@ def test_find_edges_from_vertex(point_a, point_b, point_c):
 
     edges_found = graph.find_edges_from_vertex(point_b.wkt)
     assert set(edges_found) == {"edge_1", "edge_2"}
+
+
+def test_contract_degree_2_vertices_undirected_graph():
+    graph = GraphHelpers(init_logger(), is_directed=False)
+    graph.add_edge("a", "b", "edge_1", 1.0)
+    graph.add_edge("b", "c", "edge_2", 2.0)
+    graph.add_edge("c", "d", "edge_3", 3.0)
+    graph.add_edge("c", "e", "edge_4", 4.0)
+
+    contracted_graph, contracted_edges = graph.contract_degree_2_vertices()
+    assert contracted_graph.num_vertices() == 4
+    assert contracted_graph.num_edges() == 3
+    assert not contracted_graph.vertex_exists_from_name("b")
+    assert sorted(map(sorted, contracted_edges.values())) == [
+        ["edge_1", "edge_2"],
+        ["edge_3"],
+        ["edge_4"],
+    ]
+    chain_name = next(
+        name for name, edges in contracted_edges.items() if len(edges) == 2
+    )
+    assert (
+        contracted_graph.edge_weights[contracted_graph.find_edge_from_name(chain_name)]
+        == 3.0
+    )
+
+    # a protected vertex is kept
+    contracted_graph, _ = graph.contract_degree_2_vertices({"b"})
+    assert contracted_graph.num_edges() == 4
+
+
+def test_contract_degree_2_vertices_directed_graph():
+    graph = GraphHelpers(init_logger(), is_directed=True)
+    graph.add_edge("a", "b", "edge_1", 1.0)
+    graph.add_edge("b", "a", "edge_2", 1.0)
+    graph.add_edge("b", "c", "edge_3", 2.0)
+    graph.add_edge("c", "b", "edge_4", 2.0)
+    # c -> d is a oneway: c is not a chain vertex
+    graph.add_edge("c", "d", "edge_5", 5.0)
+
+    contracted_graph, contracted_edges = graph.contract_degree_2_vertices()
+    assert not contracted_graph.vertex_exists_from_name("b")
+    assert contracted_edges == {
+        "edge_1": ["edge_1", "edge_3"],
+        "edge_4": ["edge_4", "edge_2"],
+        "edge_5": ["edge_5"],
+    }
+    assert contracted_graph.edge_weights[contracted_graph.find_edge_from_name("edge_1")] == 3.0
+
+
+def test_components():
+    graph = GraphHelpers(init_logger(), is_directed=False)
+    graph.add_edge("a", "b", "edge_1", 1.0)
+    graph.add_edge("b", "c", "edge_2", 1.0)
+    graph.add_edge("d", "e", "edge_3", 1.0)
+
+    assert graph.same_component("a", "c")
+    assert not graph.same_component("a", "d")
+    assert not graph.same_component("a", "Hello ?")
+
+    # labels are refreshed when the graph changes
+    graph.add_edge("c", "d", "edge_4", 1.0)
+    assert graph.same_component("a", "e")
+
+    graph.add_edge("f", "g", "edge_5", 1.0)
+    assert graph.keep_largest_components() == 2
+    assert graph.num_vertices() == 5
+    assert not graph.vertex_exists_from_name("f")
+    assert not graph.edge_exists_from_name("edge_5")
+    assert graph.find_vertex_names_from_edge_name("edge_3") == ("d", "e")
+
+
+def test_find_edges_from_reached_vertices():
+    graph = GraphHelpers(init_logger(), is_directed=False, integer_edge_names=True)
+    graph.add_edge("a", "b", 10, 1.0)
+    graph.add_edge("b", "c", 11, 1.0)
+    graph.add_edge("c", "d", 12, 1.0)
+
+    vertices_reached = np.zeros(graph.num_vertices(), dtype=bool)
+    vertices_reached[
+        [int(graph.find_vertex_from_name(name)) for name in ("a", "b", "c")]
+    ] = True
+
+    edges_found = graph.find_edges_from_reached_vertices(vertices_reached)
+    assert sorted(graph.edge_names.a[edges_found].tolist()) == [10, 11]
+
+
+def test_multi_source_shortest_distance():
+    graph = GraphHelpers(init_logger(), is_directed=False)
+    graph.add_edge("a", "b", "edge_1", 1.0)
+    graph.add_edge("b", "c", "edge_2", 1.5)
+    graph.add_edge("c", "d", "edge_3", 1.0)
+    graph.add_edge("d", "e", "edge_4", 1.0)
+
+    def by_name(values):
+        return {
+            graph.vertex_names[vertex]: value
+            for vertex, value in zip(graph.vertices(), values.tolist())
+        }
+
+    distances, nearest_sources = graph.multi_source_shortest_distance(["a", "e"])
+    assert by_name(distances) == {"a": 0.0, "b": 1.0, "c": 2.0, "d": 1.0, "e": 0.0}
+    assert by_name(nearest_sources) == {"a": 0, "b": 0, "c": 1, "d": 1, "e": 1}
+
+    distances, nearest_sources = graph.multi_source_shortest_distance(
+        ["a", "e"], max_dist=1.0
+    )
+    assert by_name(distances)["c"] == np.inf
+    assert by_name(nearest_sources)["c"] == -1
+
+    # the super source is removed
+    assert graph.num_vertices() == 5
+    assert graph.num_edges() == 4
+
+
+def test_temporary_vertices():
+    graph = GraphHelpers(init_logger(), is_directed=True, integer_edge_names=True)
+    graph.add_edge("a", "b", 10, 10.0)
+    graph.add_edge("b", "c", 11, 10.0)
+
+    source_vertex, source_edges = graph.add_temporary_vertex([(10, 0.2)], 1.0)
+    target_vertex, target_edges = graph.add_temporary_vertex([(10, 0.7)], 1.0)
+    distances = shortest_distance(
+        graph, source=graph.vertex(source_vertex), weights=graph.edge_weights
+    ).a
+
+    # connector, then the link between the 2 splits of the edge 10, then connector
+    assert distances[target_vertex] == pytest.approx(7.0)
+    assert distances[int(graph.find_vertex_from_name("c"))] == pytest.approx(19.0)
+    edges_part = [
+        edge_part
+        for edge_part in {**source_edges, **target_edges}.values()
+        if edge_part[0] != -1
+    ]
+    assert sorted(edges_part) == [(0, 0.0, 0.2), (0, 0.0, 0.7), (0, 0.2, 0.7), (0, 0.2, 1.0), (0, 0.7, 1.0)]
+
+    graph.remove_temporary_vertices()
+    assert graph.num_vertices() == 3
+    assert graph.num_edges() == 2
+    assert graph.find_edge_from_name(11) is not None
+
+
+def test_nearest_vertices(point_a, point_b, point_c):
+    graph = GraphHelpers(init_logger(), is_directed=False)
+    graph.add_edge(point_a.wkt, point_b.wkt, "edge_1")
+
+    assert graph.nearest_vertices([point_a, point_b]).tolist() == [0, 1]
+
+    # the tree is rebuilt with the new vertex
+    graph.add_edge(point_b.wkt, point_c.wkt, "edge_2")
+    assert graph.nearest_vertices([point_c]).tolist() == [2]
+
+    vertices_found = graph.nearest_vertices([point_c], k=2)
+    assert vertices_found.shape == (1, 2)
+    assert vertices_found[0, 0] == 2
+
+    far_point = Point(point_c.x + 1, point_c.y + 1)
+    assert graph.nearest_vertices([far_point], max_dist=0.5).tolist() == [-1]
+
+
+def test_multi_source_shortest_distance_after_edges_removal():
+    graph = GraphHelpers(init_logger(), is_directed=False)
+    graph.add_edge("a", "b", "edge_1", 1.0)
+    graph.add_edge("b", "c", "edge_2", 1.0)
+
+    # the freed edge indexes keep their weights
+    graph.add_temporary_vertex([("edge_1", 0.5)], 100.0)
+    graph.remove_temporary_vertices()
+
+    distances, _ = graph.multi_source_shortest_distance(["a"])
+    assert distances.tolist() == [0.0, 1.0, 2.0]
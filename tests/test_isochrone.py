@@ -1,7 +1,27 @@
 import pytest
 
+from collections import OrderedDict
+
+import numpy as np
+import geopandas as gpd
+
+import shapely
+
 from osmgt import OsmGt
 
+from osmgt.network.gt_helper import GraphHelpers
+from osmgt.processing.isochrone import OsmGtIsochrone
+from osmgt.processing.isochrone import cut_edge_on_bands
+from osmgt.processing.isochrone import compute_origin_isochrones
+from osmgt.processing.isochrone import init_isochrones_by_origin_worker
+
+from osmgt.geometry.geom_helpers import reproject_geometries
+from osmgt.geometry.geom_helpers import compute_wg84_line_length
+
+from osmgt.helpers.global_values import isochrone_display_mode_metric
+
+from shapely.geometry import LineString
+from shapely.geometry import Point
 from shapely.geometry import Polygon
 
 
@@ -121,3 +141,207 @@ def test_isochrone_from_distances(location_point, isochrone_distance_values, iso
     assert isochrones_lines["geometry"].unary_union.within(
         Polygon(isochrones_dissolved.exterior)  # there are (very small gaps between isochrones... so get exterior)
     )
+
+
+def build_synthetic_isochrone(isochrones_distances, is_directed, partial_edges=True):
+    # isochrone computed on a synthetic network (set on the instance), without any osm data
+    isochrone = OsmGtIsochrone(
+        3, None, distance_to_compute=list(isochrones_distances), partial_edges=partial_edges
+    )
+    isochrone._isochrones_distances = sorted(isochrones_distances)
+    isochrone._graph = GraphHelpers(
+        isochrone.logger, is_directed=is_directed, integer_edge_names=True
+    )
+    return isochrone
+
+
+@pytest.mark.parametrize(
+    "source_distance, target_distance, weight, is_directed, parts_expected",
+    [
+        # directed edge crossing all the bands
+        (5.0, 25.0, 20.0, True, [(0.0, 0.25, 0), (0.25, 0.75, 1), (0.75, 1.0, 2)]),
+        # directed edge: only reached from its source
+        (np.inf, 0.0, 10.0, True, [(0.0, 1.0, 2)]),
+        # undirected edge reached from its source only
+        (15.0, np.inf, 10.0, False, [(0.0, 0.5, 1), (0.5, 1.0, 2)]),
+        # undirected edge reached from both ends
+        (0.0, 0.0, 30.0, False, [(0.0, 1 / 3, 0), (1 / 3, 2 / 3, 1), (2 / 3, 1.0, 0)]),
+    ],
+)
+def test_cut_edge_on_bands(
+    source_distance, target_distance, weight, is_directed, parts_expected
+):
+    parts = cut_edge_on_bands(
+        source_distance, target_distance, weight, [10.0, 20.0], is_directed
+    )
+
+    assert len(parts) == len(parts_expected)
+    for (start, end, band), (start_expected, end_expected, band_expected) in zip(
+        parts, parts_expected
+    ):
+        assert start == pytest.approx(start_expected)
+        assert end == pytest.approx(end_expected)
+        assert band == band_expected
+
+
+@pytest.mark.parametrize("is_directed", [True, False])
+def test_cut_network_on_bands(is_directed):
+    isochrone = build_synthetic_isochrone([10.0, 20.0], is_directed)
+    isochrone._graph.add_edge("a", "b", 0, 20.0)
+    isochrone._graph.add_edge("b", "c", 1, 20.0)
+    # the source is a, the vertices are indexed by name order
+    isochrone._vertices_distance = np.array([0.0, 20.0, np.inf])
+    isochrone._network_gdf = gpd.GeoDataFrame(
+        {
+            "topo_uuid": [1, 0],
+            "geometry": [LineString([(20, 0), (40, 0)]), LineString([(0, 0), (20, 0)])],
+        },
+        crs=4326,
+    )
+
+    isochrone._OsmGtIsochrone__cut_network_on_bands()
+    network_gdf = isochrone._network_gdf
+
+    # the line 0 is cut on 10 meters, the line 1 is not reached
+    assert network_gdf["topo_uuid"].tolist() == [1, 0, 0]
+    assert network_gdf["__band__"].tolist() == [2, 0, 1]
+    assert [list(geometry.coords) for geometry in network_gdf["geometry"]] == [
+        [(20, 0), (40, 0)],
+        [(0, 0), (10, 0)],
+        [(10, 0), (20, 0)],
+    ]
+
+
+def test_cut_network_on_bands_on_geodesic_length():
+    isochrone = build_synthetic_isochrone([150.0, 1000.0], True)
+    # diagonal line: its segments do not have the same ratio on the planar and the geodesic lengths
+    line = LineString([(4.0, 46.0), (4.001, 46.0005), (4.0015, 46.002)])
+    weight = compute_wg84_line_length(line)
+    isochrone._graph.add_edge("a", "b", 0, weight)
+    isochrone._vertices_distance = np.array([0.0, weight])
+    isochrone._network_gdf = gpd.GeoDataFrame(
+        {"topo_uuid": [0], "geometry": [line]}, crs=4326
+    )
+
+    isochrone._OsmGtIsochrone__cut_network_on_bands()
+    network_gdf = isochrone._network_gdf
+
+    assert network_gdf["__band__"].tolist() == [0, 1]
+    assert compute_wg84_line_length(network_gdf["geometry"].iloc[0]) == pytest.approx(
+        150.0, rel=1e-3
+    )
+    assert compute_wg84_line_length(network_gdf["geometry"].iloc[1]) == pytest.approx(
+        weight - 150.0, rel=1e-3
+    )
+
+
+def test_compute_origin_isochrones():
+    # 2 disconnected roads (metric crs), one origin on each
+    edges = np.array([[0, 1], [1, 2], [3, 4]])
+    network_geometries = np.array(
+        [
+            LineString([(0, 0), (100, 0)]),
+            LineString([(100, 0), (200, 0)]),
+            LineString([(10000, 0), (10100, 0)]),
+        ],
+        dtype=object,
+    )
+    init_isochrones_by_origin_worker(
+        5,
+        False,
+        edges,
+        np.array([100.0, 100.0, 100.0]),
+        shapely.to_wkb(network_geometries),
+        shapely.to_wkb(np.array([], dtype=object)),
+        [(1, 100.0), (2, 200.0)],
+        isochrone_display_mode_metric,
+        "buffer",
+        "EPSG:3857",
+    )
+
+    origins_isochrones = [compute_origin_isochrones(origin) for origin in (0, 3)]
+
+    for origin_isochrones, origin_position in zip(
+        origins_isochrones, [(0, 0), (10000, 0)]
+    ):
+        assert [(iso_time, dist) for iso_time, dist, _ in origin_isochrones] == [
+            (1, 100.0),
+            (2, 200.0),
+        ]
+        first_isochrone = reproject_geometries(
+            [shapely.from_wkb(origin_isochrones[0][-1])], "EPSG:4326", "EPSG:3857"
+        )[0]
+        assert first_isochrone.distance(Point(origin_position)) < 1
+
+    # the second origin does not reach a second road: its second isochrone is empty
+    assert not shapely.from_wkb(origins_isochrones[0][1][-1]).is_empty
+    assert shapely.from_wkb(origins_isochrones[1][1][-1]).is_empty
+
+
+def test_clean_network_merges_the_segments_by_band():
+    isochrone = build_synthetic_isochrone([10.0, 20.0], is_directed=False)
+    isochrone._isochrones_data = []
+    # segments given in reverse order: way 7 is split across 2 bands (its last segment is not reached),
+    # way 8 is a backward way (reversed segments)
+    isochrone._network_gdf = gpd.GeoDataFrame(
+        {
+            "topo_uuid": [3, 2, 1, 0, 11, 10],
+            "topo_way": [7, 7, 7, 7, 8, 8],
+            "topo_split": [0, 0, 0, 0, 0, 0],
+            "topo_direction": [0, 0, 0, 0, 2, 2],
+            "topo_segment": [3, 2, 1, 0, 0, 1],
+            "__band__": [2, 1, 0, 0, 0, 0],
+            "geometry": [
+                LineString([(3, 0), (4, 0)]),
+                LineString([(2, 0), (3, 0)]),
+                LineString([(1, 0), (2, 0)]),
+                LineString([(0, 0), (1, 0)]),
+                LineString([(1, 1), (0, 1)]),
+                LineString([(2, 1), (1, 1)]),
+            ],
+        },
+        crs=4326,
+    )
+
+    isochrone._OsmGtIsochrone__clean_network()
+    network_gdf = isochrone._network_gdf
+
+    assert network_gdf["topo_uuid"].tolist() == [0, 1, 2]
+    assert network_gdf["iso_distance"].tolist() == [10.0, 20.0, 10.0]
+    # 3 km/h: 10 meters in 0.2 minute
+    assert network_gdf["iso_name"].tolist() == pytest.approx([0.2, 0.4, 0.2])
+    assert [list(geometry.coords) for geometry in network_gdf["geometry"]] == [
+        [(0, 0), (1, 0), (2, 0)],
+        [(2, 0), (3, 0)],
+        [(2, 1), (1, 1), (0, 1)],
+    ]
+
+
+def test_water_area_cache(monkeypatch):
+    bboxes_queried = []
+
+    def query_water_area(self, bbox_input):
+        bboxes_queried.append(bbox_input)
+        return np.array([Polygon([(0, 0), (1, 0), (1, 1)])], dtype=object)
+
+    monkeypatch.setattr(
+        OsmGtIsochrone, "_OsmGtIsochrone__query_water_area", query_water_area
+    )
+    monkeypatch.setattr(OsmGtIsochrone, "_OsmGtIsochrone__WATER_AREA_CACHE", OrderedDict())
+    monkeypatch.setattr(OsmGtIsochrone, "_OsmGtIsochrone__WATER_AREA_CACHE_SIZE", 1)
+
+    def get_water_area(bbox):
+        isochrone = build_synthetic_isochrone([10.0], is_directed=False)
+        isochrone._location_point_reprojected_buffered_bounds = bbox
+        isochrone._OsmGtIsochrone__get_water_area_from_osm()
+        return isochrone._water_area
+
+    water_area = get_water_area((0, 0, 10, 10))
+    # a bbox contained in a cached bbox is not queried
+    assert get_water_area((1, 1, 9, 9)) is water_area
+    assert bboxes_queried == [(0, 0, 10, 10)]
+
+    # the cache is bounded: the first bbox is removed
+    get_water_area((20, 20, 30, 30))
+    get_water_area((1, 1, 9, 9))
+    assert bboxes_queried == [(0, 0, 10, 10), (20, 20, 30, 30), (1, 1, 9, 9)]
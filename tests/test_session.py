@@ -0,0 +1,108 @@
+import pytest
+
+import numpy as np
+
+from osmgt.processing.session import NetworkSession
+from osmgt.processing.session import NetworkSessionError
+
+from osmgt.geometry.geom_helpers import compute_wg84_line_length
+
+from shapely.geometry import LineString
+from shapely.geometry import Point
+
+
+def build_synthetic_session():
+    # session loaded on a synthetic network (set on the instance), without any osm data
+    lines = [
+        LineString([(4.000, 46.0), (4.001, 46.0)]),
+        LineString([(4.001, 46.0), (4.002, 46.0)]),
+        LineString([(4.001, 46.001), (4.001, 46.0)]),
+        # island, removed
+        LineString([(4.010, 46.010), (4.011, 46.010)]),
+    ]
+    session = NetworkSession()
+    session._mode = "pedestrian"
+    session._OUTPUT_EXPECTED_GEOM_TYPE = "LineString"
+    session._output_data = [
+        {
+            "topo_uuid": line_idx,
+            "id": str(line_idx),
+            "osm_url": f"url_{line_idx}",
+            "geometry": line,
+        }
+        for line_idx, line in enumerate(lines)
+    ]
+    session._NetworkSession__build_session(1)
+
+    return session
+
+
+def coordinates(geometry):
+    return np.array(geometry.coords)
+
+
+def test_session_not_loaded():
+    with pytest.raises(NetworkSessionError):
+        NetworkSession().shortest_path([(Point(4.0, 46.0), Point(4.001, 46.0))])
+
+
+def test_session_shortest_path_on_edges():
+    session = build_synthetic_session()
+    nb_vertices, nb_edges = session._graph.num_vertices(), session._graph.num_edges()
+    assert nb_edges == 3
+
+    source, target, target_on_source_edge = (
+        Point(4.0002, 46.00001),
+        Point(4.0015, 46.00001),
+        Point(4.0008, 46.00001),
+    )
+    shortest_paths = session.shortest_path(
+        [(source, target), (target, source), (source, target_on_source_edge)]
+    )
+    paths = {
+        (row["source_node"], row["target_node"]): row
+        for _, row in shortest_paths.iterrows()
+    }
+
+    # the points are snapped on their edge, the path goes through the split vertices
+    path = paths[(source.wkt, target.wkt)]
+    assert coordinates(path["geometry"]) == pytest.approx(
+        np.array([(4.0002, 46.0), (4.001, 46.0), (4.0015, 46.0)])
+    )
+    assert path["length"] == pytest.approx(
+        compute_wg84_line_length(path["geometry"]), rel=1e-3
+    )
+    assert coordinates(paths[(target.wkt, source.wkt)]["geometry"]) == pytest.approx(
+        np.array([(4.0015, 46.0), (4.001, 46.0), (4.0002, 46.0)])
+    )
+    # source and target on the same edge
+    assert coordinates(
+        paths[(source.wkt, target_on_source_edge.wkt)]["geometry"]
+    ) == pytest.approx(np.array([(4.0002, 46.0), (4.0008, 46.0)]))
+
+    # the temporary vertices are removed after each query
+    assert session._graph.num_vertices() == nb_vertices
+    assert session._graph.num_edges() == nb_edges
+
+
+def test_session_isochrones_on_a_reused_graph():
+    session = build_synthetic_session()
+    nb_vertices, nb_edges = session._graph.num_vertices(), session._graph.num_edges()
+    source = Point(4.0002, 46.00001)
+
+    for _ in range(2):
+        isochrones = session.isochrones([source], [100, 200])
+
+        assert isochrones["iso_distance"].tolist() == [100, 200]
+        assert isochrones["geometry"].iloc[0].intersects(source.buffer(0.0001))
+        assert session._graph.num_vertices() == nb_vertices
+        assert session._graph.num_edges() == nb_edges
+
+    # the session answers the shortest paths on the same graph
+    assert session.shortest_path([(source, Point(4.0015, 46.00001))]).shape[0] == 1
+
+
+def test_session_isochrones_unknown_polygon_method():
+    session = build_synthetic_session()
+    with pytest.raises(ValueError):
+        session.isochrones([Point(4.0002, 46.00001)], [50], polygon_method="unknown")
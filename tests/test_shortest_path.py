@@ -3,6 +3,10 @@ import pytest
 from osmgt import OsmGt
 
 from osmgt.compoments.roads import AdditionalNodesOutsideWorkingArea
+from osmgt.processing.shortest_path import OsmGtShortestPath
+
+from shapely.geometry import LineString
+from shapely.geometry import Point
 
 
 def test_if_shortest_path_from_location_with_duplicated_nodes_pairs(
@@ -82,3 +86,38 @@ def test_if_shortest_path_from_bbox_with_an_outside_node_on_pairs(
             "These following points are outside the working area: POINT (-74.00411 40.722584)"
             == str(excinfo.value)
         )
+
+
+def test_shortest_path_on_a_contracted_undirected_chain():
+    point_a, point_b, point_c, point_d = (0, 0), (1, 0), (2, 1), (3, 1)
+    lines = [
+        LineString([point_a, point_b]),
+        LineString([point_c, point_b]),  # digitized backward
+        LineString([point_c, point_d]),
+    ]
+
+    shortest_path = OsmGtShortestPath(
+        [(Point(point_a), Point(point_d)), (Point(point_d), Point(point_a))]
+    )
+    shortest_path._mode = "pedestrian"
+    shortest_path._OUTPUT_EXPECTED_GEOM_TYPE = "LineString"
+    shortest_path._output_data = [
+        {
+            "topo_uuid": line_idx,
+            "id": str(line_idx),
+            "osm_url": f"url_{line_idx}",
+            "geometry": line,
+        }
+        for line_idx, line in enumerate(lines)
+    ]
+    shortest_paths = shortest_path._compute_data_and_graph()
+
+    # the 3 lines are contracted into 1 edge, traversed from its source then from its target
+    assert shortest_path._graph.num_edges() == 1
+    assert shortest_paths.shape[0] == 2
+    paths = {
+        row["source_node"]: list(row["geometry"].coords)
+        for _, row in shortest_paths.iterrows()
+    }
+    assert paths[Point(point_a).wkt] == [point_a, point_b, point_c, point_d]
+    assert paths[Point(point_d).wkt] == [point_d, point_c, point_b, point_a]